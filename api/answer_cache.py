@@ -0,0 +1,111 @@
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Case, spacing and surrounding punctuation don't change what a question asks."""
+    question = unicodedata.normalize("NFKC", question).casefold()
+    return re.sub(r"\s+", " ", question).strip(" ?!.,;:\"'")
+
+
+class AnswerCache:
+    """LRU cache of /query and paths-mode /chat answers per graph version and question.
+
+    Entries are keyed by (graph_id, graph version, variant, question), where the
+    variant holds whatever else shapes the answer (endpoint, mode, level). When a
+    graph is seen at a new version its older entries are dropped, so an update
+    invalidates them without the ingestion path knowing about this cache.
+
+    With `similarity_threshold` set (and an `embed_model`), a question that misses
+    exactly is embedded and answered from the most similar cached question of the
+    same graph version and variant, if its cosine similarity reaches the threshold.
+    Only touched from the event loop.
+    """
+
+    def __init__(self, max_entries: int = 1024, similarity_threshold: float = 0.0, embed_model=None):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_model = embed_model if similarity_threshold > 0 else None
+        self._entries: "OrderedDict[tuple, Tuple[str, Optional[np.ndarray]]]" = OrderedDict()
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()  # question -> unit vector
+        self._versions = {}  # graph_id -> graph version its entries belong to
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self, graph_id: str):
+        """Drop every answer for a graph."""
+        stale = [key for key in self._entries if key[0] == graph_id]
+        for key in stale:
+            del self._entries[key]
+        self._versions.pop(graph_id, None)
+        if stale:
+            self.invalidations += 1
+
+    def _check_version(self, graph_id: str, version: Hashable):
+        if self._versions.get(graph_id, version) != version:
+            self.invalidate(graph_id)
+        self._versions[graph_id] = version
+
+    async def _embed(self, question: str) -> np.ndarray:
+        vector = self._embeddings.get(question)
+        if vector is None:
+            vector = np.asarray(await self.embed_model.aget_query_embedding(question), dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+            self._embeddings[question] = vector
+            while len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+        self._embeddings.move_to_end(question)
+        return vector
+
+    async def get(self, graph_id: str, version: Hashable, variant: Hashable, question: str) -> Optional[str]:
+        self._check_version(graph_id, version)
+        question = normalize_question(question)
+        key = (graph_id, version, variant, question)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+        if self.embed_model is not None:
+            candidates = [
+                (other, vector) for other, (_, vector) in self._entries.items()
+                if other[:3] == key[:3] and vector is not None
+            ]
+            if candidates:
+                vector = await self._embed(question)
+                scores = np.stack([other_vector for _, other_vector in candidates]) @ vector
+                best = int(np.argmax(scores))
+                other = candidates[best][0]
+                # the entry may have been evicted while the question was embedded
+                if scores[best] >= self.similarity_threshold and other in self._entries:
+                    self.similar_hits += 1
+                    self._entries.move_to_end(other)
+                    return self._entries[other][0]
+        self.misses += 1
+        return None
+
+    async def put(self, graph_id: str, version: Hashable, variant: Hashable, question: str, answer: str):
+        if self._versions.get(graph_id) != version:
+            return  # the graph changed while this answer was generated
+        question = normalize_question(question)
+        vector = await self._embed(question) if self.embed_model is not None else None
+        key = (graph_id, version, variant, question)
+        self._entries[key] = (answer, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -1,16 +1,51 @@
 import os
+import json
 import uuid
+import shutil
+import hashlib
 import asyncio
-from fastapi import FastAPI, Form, HTTPException, File, UploadFile
+import tempfile
+import contextvars
+import multiprocessing
+from fastapi import FastAPI, Form, HTTPException, File, UploadFile, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from typing import List, Dict, Optional
 
-from concurrent.futures import ThreadPoolExecutor
-from llama_index_server.rag_pipeline import RagPipeline
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from llama_index_server.rag_pipeline import RagPipeline, extraction_cache
+from llama_index_server.llm_factory import embed_model, llm_controller
+from llama_index_server.metrics import metrics, span
+from llama_index_server.config import (
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_SIZE,
+    CHAT_MODE,
+    CHUNK_WORKERS,
+    GRAPH_CACHE_SIZE,
+    GRAPH_CACHE_TTL,
+    INGEST_WORKERS,
+    QUERY_MODE,
+    RESPONSE_CACHE_MB,
+)
+from llama_index_server.process_documents import decode_and_chunk, expand_archive, is_archive
+from pipeline_registry import PipelineRegistry
+from ingestion_jobs import IngestionQueue, IngestionJob
+from response_cache import CachedResponse, ResponseCache
+from answer_cache import AnswerCache
 from models import *
 app = FastAPI()
-graphs: Dict[str, RagPipeline] = {}
+graphs = PipelineRegistry(max_entries=GRAPH_CACHE_SIZE, ttl_seconds=GRAPH_CACHE_TTL)
+responses = ResponseCache(max_bytes=RESPONSE_CACHE_MB * 1024 * 1024)
+answers = AnswerCache(
+    max_entries=ANSWER_CACHE_SIZE,
+    similarity_threshold=ANSWER_CACHE_SIMILARITY,
+    embed_model=embed_model,
+)
 executor = ThreadPoolExecutor(max_workers=20)
+# Separate pool so ingestion bursts don't queue behind (or in front of) queries
+ingest_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS)
+# Decoding and chunking batch uploads is CPU bound, so it gets processes; started on first use
+chunk_pool = None
 
 # CORS setup
 app.add_middleware(
@@ -19,33 +54,132 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Graph-Version", "X-Trace-Id"],
 )
 
 # Background-safe helpers
+# Work runs in a copy of the caller's context, so trace spans carry over into the pool
 async def run_in_thread(fn, *args):
     # loop = asyncio.get_running_loop()
     # return await loop.run_in_executor(executor, fn, *args)
     loop = asyncio.get_running_loop()
-    future = loop.run_in_executor(executor, fn, *args)
+    future = loop.run_in_executor(executor, contextvars.copy_context().run, fn, *args)
     # futures.append(future)
     return await future
 
+async def run_in_ingest_thread(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(ingest_executor, contextvars.copy_context().run, fn, *args)
+
+
+# Tracing: every request is the root span of a trace
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    with span("http", method=request.method, path=request.url.path) as root:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.inc("http_requests_total", method=request.method, path=path, status=response.status_code)
+    response.headers["X-Trace-Id"] = root.trace_id
+    return response
+
+
+def get_chunk_pool() -> ProcessPoolExecutor:
+    global chunk_pool
+    if chunk_pool is None:
+        # spawn rather than fork: the server process already runs threads
+        chunk_pool = ProcessPoolExecutor(max_workers=CHUNK_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return chunk_pool
+
 
 # Upload
-def build_pipeline_and_graph(graph_id: str, contents: str=None):
-    pipeline = RagPipeline(graph_id=graph_id, text=contents)
+def build_pipeline_and_graph(graph_id: str, contents: str=None, progress_callback=None, nodes=None, path: str=None):
+    if path is not None:
+        with open(path, "rb") as stream:
+            return RagPipeline(graph_id=graph_id, stream=stream, progress_callback=progress_callback)
+    pipeline = RagPipeline(graph_id=graph_id, text=contents, progress_callback=progress_callback, nodes=nodes)
     return pipeline
 
-import os
-async def check_in_cache(graph_id: str,) -> bool:
-    if graph_id in graphs:
-        return True
-    base_dir = os.path.join("cached_graphs", graph_id)
-    if os.path.exists(base_dir):
-        pipeline = await run_in_thread(build_pipeline_and_graph, graph_id)
-        graphs[graph_id] = pipeline
-        return True
-    return False
+def update_pipeline_from_file(pipeline: RagPipeline, path: str, progress_callback=None):
+    with open(path, "rb") as stream:
+        pipeline.update_index_from_stream(stream, progress_callback)
+
+def spool_upload(source, suffix: str = "") -> str:
+    """Copy an uploaded file to a temporary file the ingestion job streams from."""
+    with tempfile.NamedTemporaryFile(prefix="upload_", suffix=suffix, delete=False) as spooled:
+        shutil.copyfileobj(source, spooled)
+    return spooled.name
+
+async def get_pipeline(graph_id: str) -> Optional[RagPipeline]:
+    """Return the loaded pipeline for graph_id, loading it from disk once if needed."""
+    pipeline = graphs.get(graph_id)
+    if pipeline is not None:
+        graphs.hits += 1
+        return pipeline
+    index_path = os.path.join("cached_graphs", graph_id, ".index")
+    if not os.path.exists(index_path):
+        return None
+    return await graphs.get_or_load(
+        graph_id, lambda: run_in_thread(build_pipeline_and_graph, graph_id)
+    )
+
+
+# Versioned responses: ETag/304 and gzip bytes cached per graph version
+def versioned_headers(etag: str, version):
+    return {
+        "ETag": etag,
+        "X-Graph-Version": str(version[1]),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+def graph_etag(version, endpoint: str, params) -> str:
+    build_id, number = version
+    digest = hashlib.sha1(json.dumps([endpoint, params]).encode("utf-8")).hexdigest()[:12]
+    return f'"{build_id}.{number}.{digest}"'
+
+async def versioned_json_response(request: Request, pipeline: RagPipeline, endpoint: str, params, build):
+    """Serve `build()` as JSON for the pipeline's current graph version.
+
+    Returns 304 when the client already has this version, otherwise the serialized
+    (and gzip-compressed, if accepted) body, built at most once per version and params.
+    A body is cached and labeled with the version `build()` actually read, which may
+    be newer than the one checked here if an update lands in between.
+    """
+    version = (pipeline.build_id, pipeline.version)
+    etag = graph_etag(version, endpoint, params)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        responses.not_modified += 1
+        return Response(status_code=304, headers=versioned_headers(etag, version))
+
+    entry = responses.get((pipeline.graph_id, etag))
+    if entry is None:
+        def build_entry():
+            built_version, payload = pipeline.read_graph(build)
+            return built_version, CachedResponse(graph_etag(built_version, endpoint, params), payload)
+
+        version, entry = await run_in_thread(build_entry)
+        responses.put((pipeline.graph_id, entry.etag), entry)
+    headers = versioned_headers(entry.etag, version)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=entry.gzipped,
+            media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip"},
+        )
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def cached_answer(pipeline: RagPipeline, variant, question: str, answer):
+    """The cached answer to `question` at the graph's current version, else `answer()` cached."""
+    version = (pipeline.build_id, pipeline.version)
+    cached = await answers.get(pipeline.graph_id, version, variant, question)
+    if cached is not None:
+        return cached
+    response = await answer()
+    await answers.put(pipeline.graph_id, version, variant, question, response)
+    return response
 
 
 # Root check
@@ -56,77 +190,321 @@ def root():
 
 # Query endpoint
 @app.get("/query", response_model=str)
-async def query(question: str, graph_id: str = "default"):
-    if not await check_in_cache(graph_id):
+async def query(
+    question: str,
+    graph_id: str = "default",
+    mode: Optional[str] = Query(None, pattern="^(global|local)$"),
+    level: Optional[int] = Query(None, ge=0),
+):
+    """Answer from community summaries: `mode=global` maps over the few coarsest
+    communities, `mode=local` over the leaf ones, or pick a hierarchy `level`."""
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
         raise HTTPException(status_code=404, detail="Graph ID not found.")
     try:
-        answer = await run_in_thread(graphs[graph_id].query, question)
-        return answer
+        return await cached_answer(
+            pipeline,
+            ("query", mode or QUERY_MODE, level),
+            question,
+            # on the app loop: the LLM's async client can't be shared across asyncio.run loops
+            lambda: pipeline.aquery(question, mode, level),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Chat endpoint
 @app.get("/chat", response_model=str)
-async def chat(question: str, graph_id: str = "default"):
-    if not await check_in_cache(graph_id):
+async def chat(question: str, graph_id: str = "default", mode: Optional[str] = Query(None, pattern="^(agent|paths)$")):
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
         raise HTTPException(status_code=404, detail="Graph ID not found.")
     try:
-        answer = await run_in_thread(graphs[graph_id].chat, question)
-        return answer
+        if (mode or CHAT_MODE) != "paths":
+            # the ReAct agent keeps conversation memory, so its answers depend on earlier turns
+            return await run_in_thread(pipeline.chat, question, mode)
+        return await cached_answer(
+            pipeline,
+            ("chat", "paths"),
+            question,
+            lambda: run_in_thread(pipeline.chat, question, mode),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Streaming (Server-Sent Events)
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_events(events):
+    """Format (event, data) pairs as SSE and finish with a `done` or `error` event."""
+    try:
+        async for event, data in events:
+            yield sse_event(event, data)
+        yield sse_event("done", "")
+    except Exception as e:
+        yield sse_event("error", str(e))
+
+@app.get("/query/stream")
+async def query_stream(
+    question: str,
+    graph_id: str = "default",
+    mode: Optional[str] = Query(None, pattern="^(global|local)$"),
+    level: Optional[int] = Query(None, ge=0),
+):
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Graph ID not found.")
+    return StreamingResponse(
+        stream_events(pipeline.astream_query(question, mode, level)),
+        media_type="text/event-stream",
+    )
+
+@app.get("/chat/stream")
+async def chat_stream(question: str, graph_id: str = "default", mode: Optional[str] = Query(None, pattern="^(agent|paths)$")):
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Graph ID not found.")
+    return StreamingResponse(
+        stream_events(pipeline.astream_chat(question, mode)),
+        media_type="text/event-stream",
+    )
+
+
+# Community hierarchy
+@app.get("/communities", response_model=List[Community])
+async def get_communities(graph_id: str = "default", level: Optional[int] = Query(None, ge=0)):
+    """Summarized communities with their level and parent/child links, optionally of one level."""
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Graph ID not found.")
+    store = pipeline.get_graph_store()
+    try:
+        summaries = await store.aget_community_summaries()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    children = {}
+    for community_id, parent in store.community_parents.items():
+        if parent is not None:
+            children.setdefault(parent, []).append(community_id)
+    return [
+        Community(
+            id=community_id,
+            level=store.community_levels[community_id],
+            parent=store.community_parents[community_id],
+            children=sorted(children.get(community_id, [])),
+            edges=store.community_sizes[community_id],
+            summary=summary,
+        )
+        for community_id, summary in summaries.items()
+        if level is None or store.community_levels[community_id] == level
+    ]
+
+
 # Triplets
 @app.get("/triplets", response_model=TripletResponse)
-async def get_triplets(graph_id: str = "default"):
-    if not await check_in_cache(graph_id):
+async def get_triplets(
+    request: Request,
+    graph_id: str = "default",
+    entity: Optional[str] = None,
+    hops: int = Query(1, ge=0),
+    types: Optional[List[str]] = Query(None),
+    top_n: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """Triplets of the graph, optionally restricted to a neighborhood, entity types or the
+    top_n most connected entities, and paged with limit/next_cursor."""
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
         raise HTTPException(status_code=404, detail="Graph ID not found.")
 
-    try:
-        triplets = await run_in_thread(graphs[graph_id].get_triplets)
+    def build():
+        triplets, next_cursor = pipeline.get_triplet_page(entity, hops, types, top_n, cursor, limit)
         triplet_list = [
-            Triplet(
-                source=t[0][0].name,
-                source_type=t[0][0].label,
-                source_desc=t[0][0].properties.get("entity_description", ""),
-                target=t[0][2].name,
-                target_type=t[0][2].label,
-                target_desc=t[0][2].properties.get("entity_description", ""),
-                relation=t[0][1].label or "related_to",
-                relation_desc=t[0][1].properties.get("relationship_description", "")
-            ) for t in triplets
+            {
+                "source": source["id"],
+                "source_type": source["type"],
+                "source_desc": source["description"] or "",
+                "target": target["id"],
+                "target_type": target["type"],
+                "target_desc": target["description"] or "",
+                "relation": edge["relationship"],
+                "relation_desc": edge["description"] or "",
+            } for edge, source, target in triplets
         ]
-        return TripletResponse(triplets=triplet_list)
+        return {"triplets": triplet_list, "next_cursor": next_cursor}
 
+    try:
+        params = [entity, hops, sorted(types or []), top_n, cursor, limit]
+        return await versioned_json_response(request, pipeline, "triplets", params, build)
+
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Entity '{entity}' not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Graph data
 @app.get("/graph", response_model=GraphResponse)
-async def get_graph(graph_id: str = "default"):
-    if not await check_in_cache(graph_id):
+async def get_graph(
+    request: Request,
+    graph_id: str = "default",
+    entity: Optional[str] = None,
+    hops: int = Query(1, ge=0),
+    types: Optional[List[str]] = Query(None),
+    top_n: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """The graph, or the subgraph around `entity` within `hops`, filtered by entity types
+    and the top_n most connected entities. With `limit`, nodes are paged and each edge
+    comes with the page of its later endpoint; pass back `next_cursor` for the next page."""
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
         raise HTTPException(status_code=404, detail="Graph ID not found.")
 
+    def build():
+        if entity is None and not types and top_n is None and cursor is None and limit is None:
+            graph = pipeline.get_graph_json()
+            return {"nodes": graph["nodes"], "edges": graph["edges"], "next_cursor": None}
+        nodes, edges, next_cursor = pipeline.get_subgraph(entity, hops, types, top_n, cursor, limit)
+        return {"nodes": nodes, "edges": edges, "next_cursor": next_cursor}
+
     try:
-        graph = await run_in_thread(graphs[graph_id].get_graph_json)
-        nodes = [Node(**node) for node in graph['nodes']]
-        edges = [Edge(**edge) for edge in graph['edges']]  # This ensures `label` is enforced
+        params = [entity, hops, sorted(types or []), top_n, cursor, limit]
+        return await versioned_json_response(request, pipeline, "graph", params, build)
+
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Entity '{entity}' not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Graph changes since a version
+@app.get("/graph/changes", response_model=GraphChanges)
+async def get_graph_changes(request: Request, since: int, build_id: Optional[str] = None, graph_id: str = "default"):
+    """Nodes and edges added after version `since` (the version part of a /graph ETag).
+
+    Pass the `build_id` that version came from; if the graph was rebuilt since, the
+    response asks for a full refresh.
+    """
+    pipeline = await get_pipeline(graph_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="Graph ID not found.")
+
+    def build():
+        changes = pipeline.get_graph_changes(since, build_id)
+        return {
+            "build_id": pipeline.build_id,
+            "version": pipeline.version,
+            "full_refresh": changes is None,
+            "nodes": changes["nodes"] if changes else [],
+            "edges": changes["edges"] if changes else [],
+        }
 
-        return GraphResponse(nodes=graph['nodes'], edges=graph['edges'])
+    try:
+        return await versioned_json_response(request, pipeline, "graph/changes", [since, build_id], build)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def chunk_files(job: IngestionJob):
+    """Expand archives, then decode and chunk every file of a batch across the process pool.
+
+    Files that are not valid UTF-8 are skipped and listed on the job.
+    """
+    files = []
+    for name, data in job.files:
+        if is_archive(name):
+            files.extend(await run_in_ingest_thread(expand_archive, name, data))
+        else:
+            files.append((name, data))
+    loop = asyncio.get_running_loop()
+    pool = get_chunk_pool()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(pool, decode_and_chunk, name, data) for name, data in files),
+        return_exceptions=True,
+    )
+    nodes = []
+    for (name, _), result in zip(files, results):
+        if isinstance(result, UnicodeDecodeError):
+            job.skipped_files.append(name)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            nodes.extend(result)
+    return nodes
+
+async def process_upload(job: IngestionJob):
+    """Build a new graph or update an existing one for a queued upload."""
+    # Pinned so the registry can't drop the pipeline mid-job and reload a stale copy from disk
+    with span("upload", graph_id=job.graph_id, job_id=job.job_id), graphs.pinned(job.graph_id):
+        try:
+            nodes = None
+            if job.files is not None:
+                job.report("chunking")
+                with span("chunking", files=len(job.files)):
+                    nodes = await chunk_files(job)
+                job.files = None  # the raw bytes aren't needed during extraction
+                if not nodes:
+                    raise ValueError("No text found in the uploaded files.")
+            pipeline = await get_pipeline(job.graph_id)
+            if job.replay:
+                if pipeline is None:
+                    raise ValueError("Graph ID not found.")
+                await run_in_ingest_thread(pipeline.replay_failed_chunks, job.report)
+            elif pipeline is None:
+                await graphs.get_or_load(
+                    job.graph_id,
+                    lambda: run_in_ingest_thread(
+                        build_pipeline_and_graph, job.graph_id, job.contents, job.report, nodes, job.path
+                    ),
+                )
+            elif nodes is not None:
+                await run_in_ingest_thread(pipeline.insert_nodes, nodes, job.report)
+            elif job.path is not None:
+                await run_in_ingest_thread(update_pipeline_from_file, pipeline, job.path, job.report)
+            else:
+                await run_in_ingest_thread(pipeline.update_index, job.contents, job.report)
+        finally:
+            if job.path is not None and os.path.exists(job.path):
+                os.remove(job.path)
+            # use times of this job's cache hits, so eviction doesn't drop entries it just reused
+            await run_in_ingest_thread(extraction_cache.flush)
+
+ingestion_queue = IngestionQueue(process_upload, num_workers=INGEST_WORKERS)
+
+@app.on_event("startup")
+async def start_ingestion_workers():
+    ingestion_queue.start()
+
+@app.on_event("shutdown")
+async def stop_chunk_pool():
+    if chunk_pool is not None:
+        chunk_pool.shutdown(cancel_futures=True)
+
+@app.on_event("shutdown")
+def flush_extraction_cache():
+    extraction_cache.flush()
+
 @app.post("/upload", response_model=UploadResponse)
 async def upload_document(
     graph_id: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
     text: Optional[str] = Form(None)
 ):
+    """Queue a document for ingestion; poll /jobs/{job_id} for progress.
+
+    Files are spooled to disk and streamed through chunking and extraction, so
+    memory doesn't grow with the size of the document.
+    """
     try:
+        contents = path = None
         if file:
-            contents = file.file.read().decode("utf-8")
+            path = await run_in_thread(spool_upload, file.file, os.path.splitext(file.filename or "")[1])
         elif text:
             contents = text
         else:
@@ -135,33 +513,120 @@ async def upload_document(
         if not graph_id:
             graph_id = "graph_" + uuid.uuid4().hex[:8]
 
-        if not await check_in_cache(graph_id):
-            pipeline = await run_in_thread(build_pipeline_and_graph, graph_id, contents)
-            graphs[graph_id] = pipeline
-        else:
-            pipeline = graphs[graph_id]
-            await run_in_thread(pipeline.update_index, contents)
+        job = ingestion_queue.submit(graph_id, contents, path=path)
+        return UploadResponse(
+            graph_id=graph_id,
+            job_id=job.job_id,
+            status=job.status,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Ensure the graph is built and updated
+@app.post("/upload/batch", response_model=UploadResponse)
+async def upload_batch(
+    graph_id: Optional[str] = Form(None),
+    files: List[UploadFile] = File(...),
+):
+    """Queue many files, or zip/tar archives of them (e.g. a notes vault), as one job.
 
-        graph= await get_graph(graph_id)
+    Files are decoded and chunked in parallel processes and all their chunks go
+    through a single extraction run; poll /jobs/{job_id} for progress.
+    """
+    try:
+        contents = [(file.filename or f"file_{i}", await file.read()) for i, file in enumerate(files)]
+        if not graph_id:
+            graph_id = "graph_" + uuid.uuid4().hex[:8]
 
+        job = ingestion_queue.submit(graph_id, files=contents)
         return UploadResponse(
-            graph= graph,
-            graph_id=graph_id
+            graph_id=graph_id,
+            job_id=job.job_id,
+            status=job.status,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/graphs/{graph_id}/replay", response_model=UploadResponse)
+async def replay_failed_chunks(graph_id: str):
+    """Queue re-extraction of the graph's chunks whose LLM calls failed; poll /jobs/{job_id}."""
+    if await get_pipeline(graph_id) is None:
+        raise HTTPException(status_code=404, detail="Graph ID not found.")
+    job = ingestion_queue.submit(graph_id, replay=True)
+    return UploadResponse(
+        graph_id=graph_id,
+        job_id=job.job_id,
+        status=job.status,
+    )
+
+# Ingestion job status
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job ID not found.")
+    return JobStatus(**job.to_dict())
+
 # Reset
 @app.delete("/reset", response_model=str)
 async def reset_graph(graph_id: str):
-    if graph_id in graphs:
-        del graphs[graph_id]
+    answers.invalidate(graph_id)
+    if graphs.pop(graph_id) is not None:
         return f"Graph {graph_id} has been reset."
     else:
         raise HTTPException(status_code=404, detail="Graph ID not found.")
 
+# Pipeline registry counters
+@app.get("/cache/stats", response_model=Dict[str, Optional[int]])
+def cache_stats():
+    return graphs.stats()
+
+# Serialized response cache counters
+@app.get("/cache/responses", response_model=Dict[str, int])
+def response_cache_stats():
+    return responses.stats()
+
+# Answer cache counters
+@app.get("/cache/answers", response_model=Dict[str, int])
+def answer_cache_stats():
+    return answers.stats()
+
+# Prometheus metrics: stage timings, LLM usage, queue depths and cache counters
+def collect_service_metrics():
+    samples = [
+        ("executor_queue_depth", "gauge", {"pool": "query"}, executor._work_queue.qsize()),
+        ("executor_queue_depth", "gauge", {"pool": "ingest"}, ingest_executor._work_queue.qsize()),
+        ("ingestion_queue_depth", "gauge", {}, ingestion_queue.queue_depth()),
+        ("extraction_cache_requests_total", "counter", {"result": "hit"}, extraction_cache.hits),
+        ("extraction_cache_requests_total", "counter", {"result": "miss"}, extraction_cache.misses),
+    ]
+    for key, value in graphs.stats().items():
+        if value is not None:
+            samples.append(("pipeline_registry", "gauge", {"stat": key}, value))
+    for key, value in responses.stats().items():
+        samples.append(("response_cache", "gauge", {"stat": key}, value))
+    for key, value in answers.stats().items():
+        samples.append(("answer_cache", "gauge", {"stat": key}, value))
+    for key, value in llm_controller.stats().items():
+        samples.append(("llm_controller", "gauge", {"stat": key}, value))
+    return samples
+
+metrics.register_collector(collect_service_metrics)
+metrics.describe("http_requests_total", "HTTP requests by route and status.")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Recent spans of one trace (the X-Trace-Id response header)
+@app.get("/traces/{trace_id}", response_model=List[Dict])
+def get_trace(trace_id: str):
+    spans = metrics.trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found (or no longer buffered).")
+    return spans
+
 # Dev mode
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,202 @@
+"""Benchmark for graph store persistence: the llama_index JSON file vs the binary one.
+
+Builds a synthetic property graph (entities, chunk nodes and --relations relations
+with descriptions), writes it in both formats and measures, each in a fresh
+subprocess so peak RSS is not shared between runs:
+  baseline     imports only, the floor every other peak RSS includes
+  json         SimplePropertyGraphStore.from_persist_path (pydantic validation)
+  binary       GraphRAGStore.from_binary, i.e. mapping the file (what a reload does)
+  binary-full  the same plus materializing the full llama_index graph
+  binary-graph the same plus building the /graph response from the columns
+  index-json   a full pipeline reload (load_index_from_storage, as RagPipeline does)
+               with the JSON graph store
+  index-binary the same with the binary graph store
+
+The store-only modes leave out the docstore, index store and vector store JSON a
+reload also parses; the index modes include them, with one --embed-dim vector
+per chunk and per entity like the index holds.
+
+Run from the api/ directory:
+    python -m benchmarks.graph_load_benchmark [--relations 100000] [--embed-dim 1536] [--json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import resource
+import argparse
+import tempfile
+import subprocess
+
+from llama_index.core import MockEmbedding, PropertyGraphIndex, StorageContext, load_index_from_storage
+from llama_index.core.graph_stores import SimplePropertyGraphStore
+from llama_index.core.graph_stores.types import ChunkNode, EntityNode, LabelledPropertyGraph, Relation
+from llama_index.core.llms import MockLLM
+from llama_index.core.schema import TextNode
+
+from llama_index_server.graph_binary import GRAPH_BINARY_FNAME, write_graph_binary
+from llama_index_server.graph_rag_store import GraphRAGStore
+
+JSON_FNAME = "property_graph_store.json"
+JSON_INDEX_DIR = "index_json"
+BINARY_INDEX_DIR = "index_binary"
+LABELS = ["PERSON", "ORGANIZATION", "LOCATION", "CONCEPT", "EVENT", "TECHNOLOGY"]
+RELATIONS = ["works_at", "located_in", "founded", "part_of", "related_to", "studied", "influenced"]
+WORDS = "graph entity relation community summary extraction model chunk document context".split()
+
+
+def synthetic_graph(num_relations, seed=0):
+    rng = random.Random(seed)
+    num_entities = max(2, num_relations // 4)
+    graph = LabelledPropertyGraph()
+    for i in range(max(1, num_relations // 20)):
+        text = " ".join(rng.choice(WORDS) for _ in range(200))
+        graph.add_node(ChunkNode(text=text, id_=f"chunk-{i}"))
+    for i in range(num_entities):
+        graph.add_node(EntityNode(
+            name=f"Entity {i}",
+            label=rng.choice(LABELS),
+            properties={"entity_description": f"Entity {i} is a {' '.join(rng.sample(WORDS, 6))}."},
+        ))
+    while len(graph.relations) < num_relations:
+        source, target = rng.sample(range(num_entities), 2)
+        label = rng.choice(RELATIONS)
+        graph.add_relation(Relation(
+            label=label,
+            source_id=f"Entity {source}",
+            target_id=f"Entity {target}",
+            properties={"relationship_description": f"Entity {source} {label} Entity {target}: {' '.join(rng.sample(WORDS, 8))}."},
+        ))
+    return graph
+
+
+def write_index(graph, persist_dir, embed_dim, binary, seed=0):
+    """Persist a property graph index around `graph`: chunk text in the docstore and a
+    vector per chunk and entity in the vector store."""
+    rng = random.Random(seed)
+    graph_store = GraphRAGStore(graph) if binary else SimplePropertyGraphStore(graph)
+    index = PropertyGraphIndex.from_existing(
+        property_graph_store=graph_store,
+        embed_model=MockEmbedding(embed_dim=embed_dim),
+        llm=MockLLM(),
+        kg_extractors=[],
+    )
+    storage_context = index.storage_context
+    nodes = []
+    for node in graph.nodes.values():
+        if isinstance(node, ChunkNode):
+            text_node = TextNode(text=node.text, id_=node.id)
+            storage_context.docstore.add_documents([text_node])
+        else:
+            text_node = TextNode(text=str(node), id_=node.id)
+        text_node.embedding = [rng.random() for _ in range(embed_dim)]
+        nodes.append(text_node)
+    storage_context.vector_stores["default"].add(nodes)
+    storage_context.persist(persist_dir=persist_dir)
+
+
+def load_index(persist_dir, embed_dim, binary):
+    """Reload an index the way RagPipeline does."""
+    graph_store = (
+        GraphRAGStore.from_persist_dir(persist_dir)
+        if binary
+        else SimplePropertyGraphStore.from_persist_dir(persist_dir)
+    )
+    storage_context = StorageContext.from_defaults(persist_dir=persist_dir, property_graph_store=graph_store)
+    index = load_index_from_storage(
+        storage_context, embed_model=MockEmbedding(embed_dim=embed_dim), llm=MockLLM(), kg_extractors=[]
+    )
+    return index.property_graph_store
+
+
+def measure(mode, persist_dir, embed_dim):
+    """Load the graph one way; runs inside the subprocess."""
+    start = time.perf_counter()
+    relations = 0
+    if mode in ("index-json", "index-binary"):
+        binary = mode == "index-binary"
+        store = load_index(
+            os.path.join(persist_dir, BINARY_INDEX_DIR if binary else JSON_INDEX_DIR), embed_dim, binary
+        )
+        relations = store._binary.num_edges if binary else len(store.graph.relations)
+    elif mode == "json":
+        store = SimplePropertyGraphStore.from_persist_path(os.path.join(persist_dir, JSON_FNAME))
+        relations = len(store.graph.relations)
+    elif mode != "baseline":
+        store = GraphRAGStore.from_binary(os.path.join(persist_dir, GRAPH_BINARY_FNAME))
+        relations = store._binary.num_edges
+        if mode == "binary-full":
+            relations = len(store.graph.relations)
+        elif mode == "binary-graph":
+            relations = len(store.get_graph_json()["edges"])
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"seconds": elapsed, "rss_mb": peak_rss / 1024, "relations": relations}
+
+
+def run_subprocess(mode, persist_dir, embed_dim):
+    output = subprocess.check_output([
+        sys.executable, "-m", "benchmarks.graph_load_benchmark",
+        "--measure", mode, "--dir", persist_dir, "--embed-dim", str(embed_dim),
+    ])
+    return json.loads(output.splitlines()[-1])  # llama_index prints "Loading ..." lines while loading
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--relations", type=int, default=100_000)
+    parser.add_argument("--embed-dim", type=int, default=1536, help="vector size for the index modes")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.dir, args.embed_dim)))
+        return
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        graph = synthetic_graph(args.relations)
+        json_path = os.path.join(persist_dir, JSON_FNAME)
+        binary_path = os.path.join(persist_dir, GRAPH_BINARY_FNAME)
+
+        start = time.perf_counter()
+        SimplePropertyGraphStore(graph).persist(json_path)
+        json_write = time.perf_counter() - start
+        start = time.perf_counter()
+        write_graph_binary(binary_path, graph)
+        binary_write = time.perf_counter() - start
+        write_index(graph, os.path.join(persist_dir, JSON_INDEX_DIR), args.embed_dim, binary=False)
+        write_index(graph, os.path.join(persist_dir, BINARY_INDEX_DIR), args.embed_dim, binary=True)
+
+        results = {
+            "relations": len(graph.relations),
+            "nodes": len(graph.nodes),
+            "write_seconds": {"json": json_write, "binary": binary_write},
+            "file_mb": {
+                "json": os.path.getsize(json_path) / 2 ** 20,
+                "binary": os.path.getsize(binary_path) / 2 ** 20,
+            },
+            "load": {
+                mode: run_subprocess(mode, persist_dir, args.embed_dim)
+                for mode in (
+                    "baseline", "json", "binary", "binary-full", "binary-graph", "index-json", "index-binary"
+                )
+            },
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['relations']} relations, {results['nodes']} nodes")
+    print(f"write   json {results['write_seconds']['json']:.2f}s ({results['file_mb']['json']:.1f} MB)"
+          f"   binary {results['write_seconds']['binary']:.2f}s ({results['file_mb']['binary']:.1f} MB)")
+    print(f"{'load':<13} {'seconds':>8} {'peak rss MB':>12}")
+    for mode, r in results["load"].items():
+        print(f"{mode:<13} {r['seconds']:>8.3f} {r['rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
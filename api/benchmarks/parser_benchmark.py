@@ -0,0 +1,128 @@
+"""Micro-benchmark for extraction response parsing.
+
+Compares the old greedy-regex parser with `graph_parser.parse_fn` on a corpus of
+LLM responses: how many entities/relationships each one recovers, how many
+responses yield nothing, and the time per response.
+
+Responses come from, in order of preference:
+  --cache   the extraction cache (raw responses recorded by GraphRAGExtractor)
+  --corpus  a JSONL file with one {"response": "..."} per line
+  otherwise a built-in corpus of clean, fenced, chatty, malformed and truncated
+  variants of the prompt's example output.
+
+Run from the api/ directory:
+    python -m benchmarks.parser_benchmark [--cache cached_graphs/extraction_cache.sqlite] [--json]
+"""
+import re
+import json
+import time
+import sqlite3
+import argparse
+
+from llama_index_server.graph_parser import KG_TRIPLET_EXTRACT_TMPL, parse_fn
+
+
+def legacy_parse_fn(response_str):
+    """The parser used before the incremental one: greedy regex + json.loads, all or nothing."""
+    match = re.search(r"\{.*\}", response_str, re.DOTALL)
+    if not match:
+        return [], []
+    try:
+        data = json.loads(match.group(0))
+        entities = [
+            (e["entity_name"], e["entity_type"], e["entity_description"])
+            for e in data.get("entities", [])
+        ]
+        relationships = [
+            (r["source_entity"], r["target_entity"], r["relation"], r["relationship_description"])
+            for r in data.get("relationships", [])
+        ]
+        return entities, relationships
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return [], []
+
+
+def builtin_corpus():
+    start = KG_TRIPLET_EXTRACT_TMPL.index("--Example Output-") + len("--Example Output-")
+    end = KG_TRIPLET_EXTRACT_TMPL.index("-Real Data-")
+    clean = KG_TRIPLET_EXTRACT_TMPL[start:end].strip()
+    corpus = [
+        clean,
+        f"```json\n{clean}\n```",
+        f"Here are the extracted triplets:\n{clean}\nLet me know if you need anything else {{or more}}.",
+        clean.replace('"Microsoft is a technology company."', '"Microsoft is a technology company.",'),
+        clean.replace('"relation": "produced_by",', '"relation": "produced_by"'),
+    ]
+    corpus += [clean[: int(len(clean) * frac)] for frac in (0.25, 0.5, 0.75, 0.9, 0.98)]
+    return corpus
+
+
+def cache_corpus(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT response FROM extractions WHERE response != ''")]
+    finally:
+        conn.close()
+
+
+def file_corpus(path):
+    with open(path, "r") as f:
+        return [json.loads(line)["response"] for line in f if line.strip()]
+
+
+def run(parser, corpus, repeat):
+    entities = relationships = empty = 0
+    for response in corpus:
+        parsed_entities, parsed_relationships = parser(response)
+        entities += len(parsed_entities)
+        relationships += len(parsed_relationships)
+        empty += not parsed_entities and not parsed_relationships
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for response in corpus:
+            parser(response)
+    elapsed = time.perf_counter() - start
+    return {
+        "entities": entities,
+        "relationships": relationships,
+        "empty_responses": empty,
+        "us_per_response": elapsed / (repeat * len(corpus)) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache", help="extraction cache sqlite file to read recorded responses from")
+    parser.add_argument("--corpus", help='JSONL file of {"response": ...} records')
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.cache:
+        corpus = cache_corpus(args.cache)
+    elif args.corpus:
+        corpus = file_corpus(args.corpus)
+    else:
+        corpus = builtin_corpus()
+    if not corpus:
+        raise SystemExit("Corpus is empty.")
+
+    results = {
+        "responses": len(corpus),
+        "legacy": run(legacy_parse_fn, corpus, args.repeat),
+        "incremental": run(parse_fn, corpus, args.repeat),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['responses']} responses")
+    print(f"{'parser':<12} {'entities':>9} {'relations':>10} {'empty':>6} {'us/resp':>9}")
+    for name in ("legacy", "incremental"):
+        r = results[name]
+        print(f"{name:<12} {r['entities']:>9} {r['relationships']:>10} {r['empty_responses']:>6} {r['us_per_response']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
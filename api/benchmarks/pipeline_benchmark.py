@@ -0,0 +1,267 @@
+"""End-to-end offline benchmark of the service with a stub LLM and embedder.
+
+For each corpus size (in triples), in a fresh subprocess and a scratch working
+directory, it:
+  1. generates synthetic notes: "<Entity> <relation> <Entity>." sentences over a
+     skewed entity distribution, grouped into paragraphs,
+  2. builds a graph through RagPipeline (per-stage timings from its progress
+     callback: chunking, extracting, persisting), then ingests a further 10% of
+     notes with update_index,
+  3. times build_communities (clustering + summaries),
+  4. sends --queries questions to /query and /chat through the FastAPI app and
+     reports latency percentiles,
+  5. records peak RSS after every stage.
+
+The LLM and embedder are deterministic stubs (benchmarks/stubs.py) with
+configurable per-call latency and extraction response shape, so results are
+comparable across commits and nothing calls a paid API.
+
+Run from the api/ directory:
+    python -m benchmarks.pipeline_benchmark --triples 1000 10000 [--latency 0.05] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import resource
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks import stubs
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTITY_KINDS = ["Person", "Org", "Place", "Project", "Topic"]
+RELATIONS = [
+    "works with", "works at", "founded", "is located in", "leads", "mentions",
+    "depends on", "studied", "funds", "collaborates with", "reviewed", "cites",
+]
+FILLER = [
+    "This came up again in the weekly sync.",
+    "Follow up on this next week.",
+    "See the meeting notes for details.",
+    "Still waiting on confirmation.",
+]
+
+
+def entity_name(i: int) -> str:
+    return f"{ENTITY_KINDS[i % len(ENTITY_KINDS)]} {i}"
+
+
+def synthetic_notes(num_triples: int, seed: int = 0, triples_per_note: int = 8):
+    """Paragraph-sized notes with `num_triples` triple sentences in total.
+
+    Entity ids are drawn with a quadratic skew so a few hubs link many notes, like
+    people and projects that recur across real notes.
+    """
+    rng = random.Random(seed)
+    num_entities = max(10, num_triples // 3)
+    notes = []
+    for start in range(0, num_triples, triples_per_note):
+        sentences = []
+        for _ in range(min(triples_per_note, num_triples - start)):
+            source = int(num_entities * rng.random() ** 2)
+            target = int(num_entities * rng.random() ** 2)
+            if target == source:
+                target = (source + 1) % num_entities
+            sentences.append(f"{entity_name(source)} {rng.choice(RELATIONS)} {entity_name(target)}.")
+            if rng.random() < 0.3:
+                sentences.append(rng.choice(FILLER))
+        notes.append(" ".join(sentences))
+    return notes, num_entities
+
+
+def questions(num_entities: int, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    hubs = max(2, num_entities // 20)
+    return [
+        f"How is {entity_name(rng.randrange(hubs))} related to {entity_name(rng.randrange(hubs))}?"
+        for _ in range(count)
+    ]
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+class StageTimer:
+    """Progress callback recording how long the pipeline spends in each stage."""
+
+    def __init__(self):
+        self.durations = {}
+        self._stage = None
+        self._started = None
+
+    def __call__(self, stage, done=0, total=0):
+        if stage != self._stage:
+            self.finish()
+            self._stage = stage
+            self._started = time.perf_counter()
+
+    def finish(self):
+        if self._stage is not None:
+            elapsed = time.perf_counter() - self._started
+            self.durations[self._stage] = self.durations.get(self._stage, 0.0) + elapsed
+        self._stage = None
+
+
+def run_one(args, num_triples):
+    """Benchmark one corpus size; runs inside the subprocess."""
+    factory = stubs.install(
+        latency=args.latency,
+        jitter=args.jitter,
+        response_shape=args.shape,
+        embed_latency=args.embed_latency,
+        seed=args.seed,
+    )
+    from llama_index_server.rag_pipeline import RagPipeline
+
+    result = {"triples": num_triples, "stages": {}, "peak_rss_mb": {}}
+    notes, num_entities = synthetic_notes(num_triples, seed=args.seed)
+    split = max(1, len(notes) * 10 // 11)
+    base_text = "\n\n".join(notes[:split])
+    update_text = "\n\n".join(notes[split:])
+    result["peak_rss_mb"]["start"] = peak_rss_mb()
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    pipeline = RagPipeline("bench", text=base_text, progress_callback=timer)
+    timer.finish()
+    elapsed = time.perf_counter() - start
+    graph = pipeline.index.property_graph_store.graph
+    result["stages"]["ingest"] = {
+        "seconds": elapsed,
+        "breakdown": timer.durations,
+        "chunks": len(pipeline.chunk_fingerprints),
+        "relations": len(graph.relations),
+        "entities": len(pipeline.index.property_graph_store.get_entities()),
+        "triples_per_second": num_triples * split / len(notes) / elapsed,
+        "llm_calls": factory.llm.calls,
+    }
+    result["peak_rss_mb"]["ingest"] = peak_rss_mb()
+
+    if update_text:
+        timer = StageTimer()
+        calls = factory.llm.calls
+        start = time.perf_counter()
+        pipeline.update_index(update_text, progress_callback=timer)
+        timer.finish()
+        elapsed = time.perf_counter() - start
+        result["stages"]["update"] = {
+            "seconds": elapsed,
+            "breakdown": timer.durations,
+            "triples_per_second": num_triples * (len(notes) - split) / len(notes) / elapsed,
+            "llm_calls": factory.llm.calls - calls,
+        }
+        result["peak_rss_mb"]["update"] = peak_rss_mb()
+
+    store = pipeline.index.property_graph_store
+    calls = factory.llm.calls
+    start = time.perf_counter()
+    store.build_communities()
+    result["stages"]["communities"] = {
+        "seconds": time.perf_counter() - start,
+        "communities": len(store.community_summary),
+        "llm_calls": factory.llm.calls - calls,
+    }
+    result["peak_rss_mb"]["communities"] = peak_rss_mb()
+
+    from fastapi.testclient import TestClient
+    import app
+
+    app.graphs.put("bench", pipeline)
+    client = TestClient(app.app)
+    for endpoint in ("query", "chat"):
+        latencies = []
+        errors = 0
+        for question in questions(num_entities, args.queries, seed=args.seed + 1):
+            start = time.perf_counter()
+            response = client.get(f"/{endpoint}", params={"question": question, "graph_id": "bench"})
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        result["stages"][endpoint] = {"latency_seconds": percentiles(latencies), "errors": errors}
+        result["peak_rss_mb"][endpoint] = peak_rss_mb()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=API_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triples", type=int, nargs="+", default=[1000, 10000],
+                        help="corpus sizes to run, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--queries", type=int, default=20, help="questions sent to /query and to /chat")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub LLM seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random stub LLM seconds per call, up to this")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="stub embedding seconds per call")
+    parser.add_argument("--shape", choices=stubs.RESPONSE_SHAPES, default="clean", help="extraction response shape")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--run-one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        sys.path.insert(0, API_DIR)
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)  # the service keeps cached_graphs/ relative to the working directory
+            result = run_one(args, args.run_one)
+        sys.stdout.write("\n" + json.dumps(result) + "\n")
+        return
+
+    runs = []
+    for num_triples in args.triples:
+        command = [sys.executable, "-m", "benchmarks.pipeline_benchmark", "--run-one", str(num_triples)]
+        for flag in ("queries", "latency", "jitter", "embed_latency", "shape", "seed"):
+            command += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+        print(f"Running {num_triples} triples...", file=sys.stderr)
+        output = subprocess.check_output(command, cwd=API_DIR, text=True)
+        runs.append(json.loads(output.strip().splitlines()[-1]))  # the service prints progress before it
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("queries", "latency", "jitter", "embed_latency", "shape", "seed")
+        },
+        "runs": runs,
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Deterministic local stand-ins for the LLM and embedding model, for offline benchmarks.
+
+`install(...)` registers a replacement `llama_index_server.llm_factory` module, so it
+must run before anything imports `llama_index_server.rag_pipeline` (or `app`).
+
+StubLLM answers by recognizing which prompt it was given:
+  - triplet extraction (single or packed): every "<Entity> <relation> <Entity>."
+    sentence of the text, as JSON in the configured response shape,
+  - community summaries, per-community answers and their aggregation,
+  - the ReAct chat agent: one call to the first tool, then a final answer,
+  - anything else (e.g. keyword/synonym prompts): the entity names it contains.
+Each call sleeps for `latency` seconds (plus up to `jitter`), deterministically
+seeded, to stand in for network and generation time.
+"""
+import re
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import hashlib
+from typing import Any, List, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.llms import (
+    ChatMessage,
+    ChatResponse,
+    CompletionResponse,
+    CustomLLM,
+    LLMMetadata,
+)
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+
+ENTITY_PATTERN = r"[A-Z][a-z]+ \d+"
+TRIPLE_PATTERN = re.compile(rf"({ENTITY_PATTERN}) ([a-z]+(?: [a-z]+)*) ({ENTITY_PATTERN})\.")
+ENTITY_NAME_PATTERN = re.compile(ENTITY_PATTERN)
+CHUNK_PATTERN = re.compile(r'<chunk id="([^"]+)">\n(.*?)\n</chunk>', re.DOTALL)
+RESPONSE_SHAPES = ("clean", "fenced", "chatty", "truncated", "mixed")
+
+
+def extraction(text: str):
+    """Entities and relationships of every synthetic triple sentence in `text`."""
+    entities = {}
+    relationships = []
+    for source, relation, target in TRIPLE_PATTERN.findall(text):
+        for name in (source, target):
+            entities.setdefault(name, {
+                "entity_name": name,
+                "entity_type": name.split()[0].upper(),
+                "entity_description": f"{name} appears in the notes.",
+            })
+        relationships.append({
+            "source_entity": source,
+            "target_entity": target,
+            "relation": relation.replace(" ", "_"),
+            "relationship_description": f"{source} {relation} {target}.",
+        })
+    return {"entities": list(entities.values()), "relationships": relationships}
+
+
+class StubLLM(CustomLLM):
+    """Deterministic LLM replacement; see the module docstring for what it answers."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    response_shape: str = "clean"
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    calls: int = 0
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "StubLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="stub", context_window=128000, num_output=2048)
+
+    def _delay(self) -> float:
+        self.calls += 1
+        return self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+
+    def _shape(self, payload: dict, prompt: str) -> str:
+        body = json.dumps(payload)
+        shape = self.response_shape
+        if shape == "mixed":
+            digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+            shape = RESPONSE_SHAPES[digest % (len(RESPONSE_SHAPES) - 1)]
+        if shape == "fenced":
+            return f"```json\n{body}\n```"
+        if shape == "chatty":
+            return f"Here are the extracted triplets:\n{body}\nLet me know if you need anything else."
+        if shape == "truncated":
+            return body[: int(len(body) * 0.9)]
+        return body
+
+    def respond(self, prompt: str) -> str:
+        if "<chunk id=" in prompt:
+            chunks = {chunk_id: extraction(text) for chunk_id, text in CHUNK_PATTERN.findall(prompt)}
+            return self._shape({"chunks": chunks}, prompt)
+        if "-Real Data-" in prompt:
+            return self._shape(extraction(prompt.rsplit("text:", 1)[-1]), prompt)
+        if "relationships from a knowledge graph" in prompt:
+            names = sorted(set(ENTITY_NAME_PATTERN.findall(prompt)))
+            return "This community connects " + ", ".join(names[:12]) + "."
+        if "Combine the following" in prompt or "Answers:" in prompt:
+            return "Combined answer: " + " ".join(
+                line.strip() for line in prompt.splitlines() if line.strip().startswith("Answer")
+            )[:2000]
+        if "Tool Name:" in prompt:
+            return self._react(prompt)
+        if "NO_RELEVANT_INFORMATION" in prompt:
+            summary, _, query = prompt.rpartition("Query:")
+            shared = set(ENTITY_NAME_PATTERN.findall(summary)) & set(ENTITY_NAME_PATTERN.findall(query))
+            if not shared:
+                return "NO_RELEVANT_INFORMATION"
+            return "Answer: " + ", ".join(sorted(shared)) + " are connected in this community."
+        names = sorted(set(ENTITY_NAME_PATTERN.findall(prompt)))
+        return "^".join(names[:10]) or "none"
+
+    def _react(self, prompt: str) -> str:
+        # the agent's format instructions also show an "Observation:", so only count one after the question
+        if prompt.rfind("Observation:") > prompt.find("\nuser:") > -1:
+            return "Thought: I can answer without using any more tools.\nAnswer: " + (
+                prompt.rsplit("Observation:", 1)[-1].strip().splitlines() or [""]
+            )[0][:500]
+        tool = re.search(r"Tool Name: (\S+)", prompt)
+        question = prompt.rsplit("user:", 1)[-1].strip().splitlines()[0] if "user:" in prompt else prompt[-200:]
+        return (
+            "Thought: I need to use a tool to help me answer the question.\n"
+            f"Action: {tool.group(1) if tool else 'query_engine_tool'}\n"
+            f"Action Input: {json.dumps({'input': question})}"
+        )
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self._delay())
+        return CompletionResponse(text=self.respond(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        time.sleep(self._delay())
+        text = self.respond(prompt)
+
+        def gen():
+            so_far = ""
+            for word in text.split(" "):
+                so_far += word + " "
+                yield CompletionResponse(text=so_far, delta=word + " ")
+
+        return gen()
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        await asyncio.sleep(self._delay())
+        return CompletionResponse(text=self.respond(prompt))
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        await asyncio.sleep(self._delay())
+        text = self.respond(self.messages_to_prompt(messages))
+        return ChatResponse(message=ChatMessage(role="assistant", content=text))
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        await asyncio.sleep(self._delay())
+        text = self.respond(self.messages_to_prompt(messages))
+
+        async def gen():
+            so_far = ""
+            for word in text.split(" "):
+                so_far += word + " "
+                yield ChatResponse(
+                    message=ChatMessage(role="assistant", content=so_far), delta=word + " "
+                )
+
+        return gen()
+
+
+class StubEmbedding(BaseEmbedding):
+    """Hashed bag-of-words embeddings: deterministic, and texts sharing words are similar."""
+
+    embed_dim: int = 64
+    latency: float = 0.0
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "StubEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.embed_dim
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[digest[0] % self.embed_dim] += 1.0 if digest[1] % 2 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._get_text_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._embed(query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+
+def install(latency=0.0, jitter=0.0, response_shape="clean", embed_latency=0.0, seed=0):
+    """Register stub `llm`, `extraction_llm`, `embed_model`, `Gemini` and `llm_controller` as llama_index_server.llm_factory."""
+    from llama_index_server.llm_controller import AdaptiveController
+
+    llm = StubLLM(latency=latency, jitter=jitter, response_shape=response_shape, seed=seed)
+    module = types.ModuleType("llama_index_server.llm_factory")
+    module.llm = llm
+    module.extraction_llm = llm
+    module.embed_model = StubEmbedding(latency=embed_latency)
+    module.Gemini = lambda *args, **kwargs: llm
+    module.llm_controller = AdaptiveController(initial_limit=4, max_limit=32)
+    sys.modules["llama_index_server.llm_factory"] = module
+    return module
@@ -0,0 +1,139 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class IngestionJob:
+    """State of one queued upload, updated by the pipeline as it progresses."""
+
+    def __init__(
+        self,
+        graph_id: str,
+        contents: str = None,
+        files: List[Tuple[str, bytes]] = None,
+        path: str = None,
+        replay: bool = False,
+    ):
+        self.job_id = "job_" + uuid.uuid4().hex[:12]
+        self.graph_id = graph_id
+        self.contents = contents
+        self.path = path  # uploaded file spooled to disk, streamed during ingestion and then removed
+        self.files = files  # (name, bytes) of a batch upload, archives not yet expanded
+        self.replay = replay  # re-extract the graph's recorded failed chunks instead of new text
+        self.skipped_files = []  # files of a batch that could not be decoded
+        self.status = "queued"  # queued -> running -> done | failed
+        self.stage = "queued"
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    def report(self, stage: str, done: int = 0, total: int = 0):
+        """Progress callback handed to RagPipeline; safe to call from worker threads."""
+        self.stage = stage
+        if total:
+            self.chunks_done = done
+            self.chunks_total = total
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "graph_id": self.graph_id,
+            "status": self.status,
+            "stage": self.stage,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "error": self.error,
+            "skipped_files": self.skipped_files,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class IngestionQueue:
+    """Worker pool for uploads with per-graph_id serialization.
+
+    Jobs for the same graph run one at a time in submission order, while jobs
+    for different graphs run on up to `num_workers` workers in parallel. A graph
+    only enters the ready queue while it has pending jobs and none running, so a
+    busy graph never ties up more than one worker.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[IngestionJob], Awaitable[None]],
+        num_workers: int = 4,
+        max_finished_jobs: int = 1000,
+    ):
+        self.process = process
+        self.num_workers = num_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._pending: Dict[str, Deque[IngestionJob]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._workers = []
+
+    def start(self):
+        """Spawn the workers; must be called from the running event loop."""
+        self._ready = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.num_workers)
+        ]
+
+    def submit(
+        self,
+        graph_id: str,
+        contents: str = None,
+        files: List[Tuple[str, bytes]] = None,
+        path: str = None,
+        replay: bool = False,
+    ) -> IngestionJob:
+        job = IngestionJob(graph_id, contents, files, path, replay)
+        self.jobs[job.job_id] = job
+        if graph_id in self._pending:
+            self._pending[graph_id].append(job)
+        else:
+            self._pending[graph_id] = deque([job])
+            self._ready.put_nowait(graph_id)
+        self._prune_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    async def _worker(self):
+        while True:
+            graph_id = await self._ready.get()
+            job = self._pending[graph_id].popleft()
+            job.status = "running"
+            job.report("starting")
+            try:
+                await self.process(job)
+                job.status = "done"
+                job.report("done")
+            except Exception as e:
+                print(f"Ingestion job {job.job_id} for {graph_id} failed: {e}")
+                job.status = "failed"
+                job.error = str(e)
+                job.report("failed")
+            finally:
+                job.contents = None
+                job.files = None
+                if self._pending[graph_id]:
+                    self._ready.put_nowait(graph_id)
+                else:
+                    del self._pending[graph_id]
+
+    def _prune_finished(self):
+        finished = [
+            job_id for job_id, job in self.jobs.items() if job.status in ("done", "failed")
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
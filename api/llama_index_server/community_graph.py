@@ -0,0 +1,96 @@
+import threading
+from array import array
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from graspologic.partition import hierarchical_leiden
+
+
+class CommunityGraph:
+    """Integer-indexed, undirected edge list of the property graph, for Leiden clustering.
+
+    Nodes get positions in the order they first appear in a relation and each
+    connected pair of nodes is one unweighted edge (parallel relations collapse, as
+    they did in the NetworkX graph this replaces). `add` keeps it current as
+    relations are upserted, so a small update doesn't rebuild a Python object graph,
+    and the last partition is kept with the edge count it was computed at:
+    clustering is skipped while no edge was added, and otherwise warm-started from it.
+    Ingestion may `add` while communities are built from a `snapshot`, so both take
+    a lock and readers get copies rather than views of the growing arrays.
+    """
+
+    def __init__(self):
+        self.node_ids: List[str] = []  # position -> node id
+        self.positions: Dict[str, int] = {}  # node id -> position
+        self.pair_keys: Dict[Tuple[int, int], str] = {}  # (low, high) positions -> last relation key between them
+        self.sources = array("i")  # one entry per pair, in the order pairs were added
+        self.targets = array("i")
+        self.clusters = None  # partition of the last `cluster` call
+        self.clustered_edges = -1  # number of edges the partition was computed with
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_relations(cls, relations: dict) -> "CommunityGraph":
+        """Build from `LabelledPropertyGraph.relations` (relation key -> Relation)."""
+        community_graph = cls()
+        for key, relation in relations.items():
+            community_graph.add(key, relation)
+        return community_graph
+
+    def _position(self, node_id: str) -> int:
+        position = self.positions.get(node_id)
+        if position is None:
+            position = self.positions[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+        return position
+
+    def add(self, key: str, relation) -> None:
+        """Record an upserted relation; a new pair of nodes adds an edge."""
+        with self._lock:
+            source = self._position(relation.source_id)
+            target = self._position(relation.target_id)
+            if source == target:
+                return  # Leiden drops self loops
+            pair = (source, target) if source < target else (target, source)
+            if pair not in self.pair_keys:
+                self.sources.append(pair[0])
+                self.targets.append(pair[1])
+            self.pair_keys[pair] = key
+
+    def num_edges(self) -> int:
+        return len(self.sources)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Copies of the edge endpoints and the node count, consistent with each other."""
+        with self._lock:
+            return (
+                np.array(self.sources, dtype=np.int32),
+                np.array(self.targets, dtype=np.int32),
+                len(self.node_ids),
+            )
+
+    def cluster(self, max_cluster_size: int, random_seed: Optional[int] = None):
+        """Hierarchical Leiden partition, reusing the cached one if no edge was added.
+
+        Nodes of the returned clusters are positions as strings (graspologic keys
+        nodes by their string form, and warm starts have to use the same keys).
+        """
+        if self.clusters is not None and self.clustered_edges == self.num_edges():
+            return self.clusters
+        if not self.num_edges():
+            return []
+        sources, targets, _ = self.snapshot()
+        starting_communities = None
+        if self.clusters is not None:
+            starting_communities = {
+                item.node: item.cluster for item in self.clusters if item.is_final_cluster
+            }
+        self.clusters = hierarchical_leiden(
+            list(zip(map(str, sources.tolist()), map(str, targets.tolist()), repeat(1.0))),
+            max_cluster_size=max_cluster_size,
+            starting_communities=starting_communities,
+            random_seed=random_seed,
+        )
+        self.clustered_edges = len(sources)
+        return self.clusters
@@ -0,0 +1,63 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for",
+    "from", "has", "have", "how", "in", "is", "it", "its", "of", "on", "or", "that",
+    "the", "their", "this", "to", "was", "were", "what", "when", "where", "which",
+    "who", "why", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with common stopwords removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class CommunityRanker:
+    """BM25 keyword index over community summaries.
+
+    Built once per set of summaries and used to pick the communities worth
+    sending to the LLM for a given query.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, community_summaries: Dict[int, str]):
+        self.community_ids = list(community_summaries.keys())
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+        self.doc_lens = []
+        for doc_idx, summary in enumerate(community_summaries.values()):
+            term_freqs = Counter(tokenize(summary))
+            self.doc_lens.append(sum(term_freqs.values()))
+            for term, freq in term_freqs.items():
+                self.postings[term].append((doc_idx, freq))
+
+        num_docs = len(self.doc_lens)
+        self.avg_len = (sum(self.doc_lens) / num_docs) if num_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def rank(self, query: str, top_k: int = 10, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Return up to `top_k` (community_id, score) pairs scoring above `min_score`, best first."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_idx, freq in self.postings[term]:
+                norm = 1 - self.b + self.b * self.doc_lens[doc_idx] / self.avg_len
+                scores[doc_idx] += idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+
+        ranked = sorted(
+            ((self.community_ids[doc_idx], score) for doc_idx, score in scores.items() if score > min_score),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[:top_k]
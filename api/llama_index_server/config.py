@@ -3,4 +3,28 @@ import os
 # 1. Load environment variables for API keys
 load_dotenv(".env")
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
\ No newline at end of file
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Loaded pipeline registry: max graphs kept in memory and idle seconds before eviction
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "64"))
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL")) if os.getenv("GRAPH_CACHE_TTL") else None
+
+# Ingestion job queue: uploads processed in parallel (one at a time per graph)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+# Processes decoding and chunking the files of batch uploads
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 2)))
+
+# Serialized /graph and /triplets responses kept in memory, in megabytes
+RESPONSE_CACHE_MB = int(os.getenv("RESPONSE_CACHE_MB", "64"))
+
+# /query and /chat?mode=paths answers kept per graph version; a cosine similarity threshold
+# (e.g. 0.95) also serves near-duplicate questions, at one embedding per miss
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+
+# Default /chat retrieval: "agent" (ReAct agent over the index) or "paths" (graph path
+# traversal answered with a single LLM call)
+CHAT_MODE = os.getenv("CHAT_MODE", "agent")
+
+# Default /query community level: "global" (coarsest communities, few LLM calls) or
+# "local" (leaf communities, for specific questions)
+QUERY_MODE = os.getenv("QUERY_MODE", "local")
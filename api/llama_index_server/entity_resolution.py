@@ -0,0 +1,145 @@
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, similarity
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.graph_stores.types import KG_NODES_KEY, KG_RELATIONS_KEY, EntityNode
+from llama_index.core.schema import BaseNode, TransformComponent
+
+LEADING_ARTICLES = {"the", "a", "an"}
+
+
+def normalize_entity_name(name: str) -> str:
+    """Case, accent, punctuation and whitespace insensitive key for an entity name."""
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    tokens = re.sub(r"[^\w\s]", " ", text).split()
+    if len(tokens) > 1 and tokens[0] in LEADING_ARTICLES:
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+class EntityResolver(TransformComponent):
+    """Merge duplicate entities across chunks before they reach the graph store.
+
+    Runs after GraphRAGExtractor and rewrites the extracted entities and relation
+    endpoints in each node's metadata to canonical names:
+      1. exact match on the normalized name ("niels bohr" == "Niels Bohr"),
+      2. alias match: a single-word name that is the last word of exactly one known
+         entity with the same type ("Bohr" -> "Niels Bohr"),
+      3. optionally, with an `embed_model`, embedding similarity against known
+         entities sharing a word with the name (blocking keeps this cheap).
+    Otherwise the name becomes a new canonical entity.
+
+    Args:
+        embed_model (Optional[BaseEmbedding]):
+            Embeds entity names for the similarity step. Disabled when None.
+        similarity_threshold (float):
+            Minimum cosine similarity for two names to be merged.
+    """
+
+    embed_model: Optional[BaseEmbedding] = None
+    similarity_threshold: float = 0.92
+
+    _key_index: Dict[str, str] = PrivateAttr(default_factory=dict)  # normalized key -> canonical name
+    _token_index: Dict[str, Set[str]] = PrivateAttr(default_factory=dict)  # word -> canonical names containing it
+    _labels: Dict[str, str] = PrivateAttr(default_factory=dict)  # canonical name -> entity type
+    _embeddings: Dict[str, List[float]] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "EntityResolver"
+
+    def add_existing(self, entities: List[EntityNode]):
+        """Seed the index with entities already in the graph store."""
+        for entity in entities:
+            key = normalize_entity_name(entity.name)
+            if key and key not in self._key_index:
+                self._register(key, entity.name, entity.label)
+
+    def _register(self, key: str, name: str, label: Optional[str]):
+        self._key_index[key] = name
+        self._labels[name] = label
+        for token in key.split():
+            self._token_index.setdefault(token, set()).add(name)
+
+    def _same_label(self, name: str, label: Optional[str]) -> bool:
+        return label is None or self._labels.get(name) in (None, label)
+
+    def _alias_match(self, key: str, label: Optional[str]) -> Optional[str]:
+        tokens = key.split()
+        if len(tokens) != 1:
+            return None
+        candidates = [
+            name for name in self._token_index.get(tokens[0], ())
+            if normalize_entity_name(name).split()[-1] == tokens[0] and self._same_label(name, label)
+        ]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _embedding(self, name: str) -> List[float]:
+        if name not in self._embeddings:
+            self._embeddings[name] = self.embed_model.get_text_embedding(name)
+        return self._embeddings[name]
+
+    def _similarity_match(self, key: str, name: str, label: Optional[str]) -> Optional[str]:
+        if self.embed_model is None:
+            return None
+        candidates = set()
+        for token in key.split():
+            candidates.update(self._token_index.get(token, ()))
+        best, best_score = None, self.similarity_threshold
+        for candidate in candidates:
+            if not self._same_label(candidate, label):
+                continue
+            score = similarity(self._embedding(name), self._embedding(candidate))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def resolve(self, name: str, label: Optional[str] = None) -> str:
+        """Return the canonical name for an entity, registering it if it is new."""
+        key = normalize_entity_name(name)
+        if not key:
+            return name
+        canonical = (
+            self._key_index.get(key)
+            or self._alias_match(key, label)
+            or self._similarity_match(key, name, label)
+        )
+        if canonical is None:
+            self._register(key, name, label)
+            return name
+        self._key_index.setdefault(key, canonical)
+        return canonical
+
+    def __call__(self, nodes: List[BaseNode], **kwargs: Any) -> List[BaseNode]:
+        """Rewrite each node's extracted entities and relations to canonical names."""
+        for node in nodes:
+            entities = node.metadata.pop(KG_NODES_KEY, [])
+            relations = node.metadata.pop(KG_RELATIONS_KEY, [])
+
+            renamed = {}
+            merged_entities = {}
+            for entity in entities:
+                if not isinstance(entity, EntityNode):
+                    merged_entities[entity.id] = entity
+                    continue
+                canonical = self.resolve(entity.name, entity.label)
+                renamed[entity.name] = canonical
+                entity.name = canonical
+                merged_entities.setdefault(canonical, entity)
+
+            merged_relations = {}
+            for relation in relations:
+                relation.source_id = renamed.get(relation.source_id) or self.resolve(relation.source_id)
+                relation.target_id = renamed.get(relation.target_id) or self.resolve(relation.target_id)
+                if relation.source_id == relation.target_id:
+                    continue  # both ends merged into one entity
+                merged_relations.setdefault(
+                    (relation.source_id, relation.label, relation.target_id), relation
+                )
+
+            node.metadata[KG_NODES_KEY] = list(merged_entities.values())
+            node.metadata[KG_RELATIONS_KEY] = list(merged_relations.values())
+        return nodes
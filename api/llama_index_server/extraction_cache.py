@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of LLM triplet extractions.
+
+    Entries are keyed by a hash of everything that determines the extraction
+    (chunk text, prompt template, model name and max paths per chunk), so the
+    same chunk is only sent to the LLM once across uploads, graphs and rebuilds.
+    The least recently used entries are evicted once the cache grows past
+    `max_bytes`.
+
+    Hits don't write: their use times are kept in memory and written with the next
+    `put` (or every `touch_batch` hits), and the total size is tracked as entries
+    come and go instead of summed on every write. The `a`-prefixed methods run the
+    blocking sqlite calls in a worker thread, for use from the event loop.
+    """
+
+    touch_batch = 256  # pending use times written at once when no put comes first
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> last use time not yet written
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, response TEXT, entities TEXT, relations TEXT, "
+            "size INTEGER, last_used REAL)"
+        )
+        self._conn.commit()
+        self.bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, prompt_template: str, model_name: str, max_paths_per_chunk: int) -> str:
+        payload = json.dumps([text, prompt_template, model_name, max_paths_per_chunk])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def cached_keys(self, keys) -> set:
+        """The subset of `keys` that are cached, in one query per 500 keys."""
+        keys = list(keys)
+        found = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key FROM extractions WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def get(self, key: str):
+        """Return (raw_response, entities, relations) for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, entities, relations FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._write_touched()
+                self._conn.commit()
+        response, entities, relations = row
+        return (
+            response,
+            [tuple(entity) for entity in json.loads(entities)],
+            [tuple(relation) for relation in json.loads(relations)],
+        )
+
+    def put(self, key: str, response: str, entities, relations):
+        """Store an extraction and evict least recently used entries over the size budget.
+
+        `response` is the raw LLM output, kept for re-parsing; pass "" when it is
+        shared by several chunks (packed requests) so it isn't stored once per chunk.
+        """
+        entities_json = json.dumps(list(entities))
+        relations_json = json.dumps(list(relations))
+        size = len(response) + len(entities_json) + len(relations_json)
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, entities_json, relations_json, size, time.time()),
+            )
+            self.bytes += size - (previous[0] if previous else 0)
+            self._touched.pop(key, None)
+            self._write_touched()
+            self._evict()
+            self._conn.commit()
+
+    async def aget(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, response: str, entities, relations):
+        await asyncio.to_thread(self.put, key, response, entities, relations)
+
+    async def acached_keys(self, keys) -> set:
+        return await asyncio.to_thread(self.cached_keys, keys)
+
+    def flush(self):
+        """Write the use times of recent hits."""
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+
+    def _write_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE extractions SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        if self.bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM extractions ORDER BY last_used ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self.bytes -= size
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", evicted)
@@ -0,0 +1,246 @@
+"""Compact binary persistence for the property graph.
+
+Layout (little endian), every section aligned to 8 bytes:
+    header    magic "N2KG", version, n_strings, n_nodes, n_edges, string bytes
+    strings   uint64 offsets[n_strings + 1], then the UTF-8 data of every
+              distinct string (names, labels, descriptions, property blobs)
+    nodes     uint8 kind[n], uint32 id[n], name[n], label[n], description[n], properties[n]
+    edges     uint32 source[e], label[e], target[e], description[e], properties[e]
+
+Node and edge columns hold indexes into the string table, so repeated labels and
+names are stored once. The file is memory-mapped on open: counts, degrees and
+the visualization export read the columns directly, and llama_index objects are
+only built when something needs the full graph.
+"""
+import os
+import json
+import mmap
+import struct
+
+import numpy as np
+from llama_index.core.graph_stores.types import (
+    ChunkNode,
+    EntityNode,
+    LabelledPropertyGraph,
+    Relation,
+)
+
+GRAPH_BINARY_FNAME = "property_graph_store.bin"
+MAGIC = b"N2KG"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIQ")
+ENTITY_KIND, CHUNK_KIND = 0, 1
+NODE_COLUMNS = ("id", "name", "label", "description", "properties")
+EDGE_COLUMNS = ("source", "label", "target", "description", "properties")
+
+
+def _pad(size: int) -> int:
+    return (8 - size % 8) % 8
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {"": 0}
+        self.strings = [""]
+
+    def add(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+
+def _split_properties(properties: dict, description_key: str):
+    properties = dict(properties)
+    description = properties.pop(description_key, "") or ""
+    blob = json.dumps(properties, sort_keys=True, default=str) if properties else ""
+    return str(description), blob
+
+
+def write_graph_binary(path: str, graph: LabelledPropertyGraph):
+    """Write the graph to `path` atomically in the compact binary format."""
+    strings = _StringTable()
+    nodes = list(graph.nodes.values())
+    kinds = np.zeros(len(nodes), dtype=np.uint8)
+    node_columns = {column: np.zeros(len(nodes), dtype=np.uint32) for column in NODE_COLUMNS}
+    for i, node in enumerate(nodes):
+        if isinstance(node, ChunkNode):
+            kinds[i] = CHUNK_KIND
+            name = node.text
+        else:
+            name = node.name
+        description, blob = _split_properties(node.properties, "entity_description")
+        node_columns["id"][i] = strings.add(node.id)
+        node_columns["name"][i] = strings.add(name)
+        node_columns["label"][i] = strings.add(node.label)
+        node_columns["description"][i] = strings.add(description)
+        node_columns["properties"][i] = strings.add(blob)
+
+    relations = list(graph.relations.values())
+    edge_columns = {column: np.zeros(len(relations), dtype=np.uint32) for column in EDGE_COLUMNS}
+    for i, relation in enumerate(relations):
+        description, blob = _split_properties(relation.properties, "relationship_description")
+        edge_columns["source"][i] = strings.add(relation.source_id)
+        edge_columns["label"][i] = strings.add(relation.label)
+        edge_columns["target"][i] = strings.add(relation.target_id)
+        edge_columns["description"][i] = strings.add(description)
+        edge_columns["properties"][i] = strings.add(blob)
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = b"".join(encoded)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded), len(nodes), len(relations), len(data)))
+        f.write(b"\0" * _pad(HEADER.size))
+        f.write(offsets.tobytes())
+        f.write(data + b"\0" * _pad(len(data)))
+        f.write(kinds.tobytes() + b"\0" * _pad(len(kinds)))
+        for column in NODE_COLUMNS:
+            f.write(node_columns[column].tobytes() + b"\0" * _pad(node_columns[column].nbytes))
+        for column in EDGE_COLUMNS:
+            f.write(edge_columns[column].tobytes() + b"\0" * _pad(edge_columns[column].nbytes))
+    os.replace(tmp_path, path)
+
+
+class BinaryGraph:
+    """Read-only, memory-mapped view of a graph written by `write_graph_binary`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_strings, n_nodes, n_edges, data_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} graph file.")
+        self.num_nodes = n_nodes
+        self.num_edges = n_edges
+
+        offset = HEADER.size + _pad(HEADER.size)
+        self._offsets = np.frombuffer(self._mm, dtype=np.uint64, count=n_strings + 1, offset=offset)
+        offset += self._offsets.nbytes
+        self._data_start = offset
+        offset += data_size + _pad(data_size)
+        self.kinds = np.frombuffer(self._mm, dtype=np.uint8, count=n_nodes, offset=offset)
+        offset += n_nodes + _pad(n_nodes)
+        self.nodes = {}
+        for column in NODE_COLUMNS:
+            self.nodes[column] = np.frombuffer(self._mm, dtype=np.uint32, count=n_nodes, offset=offset)
+            offset += 4 * n_nodes + _pad(4 * n_nodes)
+        self.edges = {}
+        for column in EDGE_COLUMNS:
+            self.edges[column] = np.frombuffer(self._mm, dtype=np.uint32, count=n_edges, offset=offset)
+            offset += 4 * n_edges + _pad(4 * n_edges)
+
+    def string(self, idx: int) -> str:
+        start = self._data_start + int(self._offsets[idx])
+        end = self._data_start + int(self._offsets[idx + 1])
+        return self._mm[start:end].decode("utf-8")
+
+    def entity_indexes(self):
+        return np.nonzero(self.kinds == ENTITY_KIND)[0]
+
+    def strings(self, indexes) -> dict:
+        """Decode the distinct strings referenced by one or more columns, keyed by index."""
+        unique = np.unique(np.concatenate([np.asarray(column) for column in indexes]))
+        offsets = self._offsets
+        data = self._mm
+        base = self._data_start
+        return {
+            idx: data[base + int(offsets[idx]):base + int(offsets[idx + 1])].decode("utf-8")
+            for idx in unique.tolist()
+        }
+
+    def to_graph_json(self):
+        """Nodes and edges in the /graph response shape, read straight from the columns."""
+        entities = self.entity_indexes()
+        node_columns = {
+            column: self.nodes[column][entities].tolist() for column in ("name", "label", "description")
+        }
+        edge_columns = {
+            column: self.edges[column].tolist() for column in ("source", "label", "target", "description")
+        }
+        strings = self.strings(list(node_columns.values()) + list(edge_columns.values()))
+
+        nodes = [
+            {"id": strings[name], "type": strings[label], "description": strings[description]}
+            for name, label, description in zip(
+                node_columns["name"], node_columns["label"], node_columns["description"]
+            )
+        ]
+        entity_names = set(node_columns["name"])
+        edges = [
+            {
+                "source": strings[source],
+                "target": strings[target],
+                "relationship": strings[label] or "related_to",
+                "description": strings[description],
+            }
+            for source, label, target, description in zip(
+                edge_columns["source"], edge_columns["label"], edge_columns["target"], edge_columns["description"]
+            )
+            if source in entity_names and target in entity_names
+        ]
+        return {"nodes": nodes, "edges": edges}
+
+    def to_labelled_graph(self) -> LabelledPropertyGraph:
+        """Materialize the full llama_index graph (skips pydantic validation)."""
+        strings = self.strings(
+            [self.nodes[column] for column in NODE_COLUMNS] + [self.edges[column] for column in EDGE_COLUMNS]
+        )
+        graph_nodes = {}
+        columns = {column: self.nodes[column].tolist() for column in NODE_COLUMNS}
+        for i, kind in enumerate(self.kinds.tolist()):
+            properties = json.loads(strings[columns["properties"][i]]) if columns["properties"][i] else {}
+            node_id = strings[columns["id"][i]]
+            if kind == CHUNK_KIND:
+                node = ChunkNode.model_construct(
+                    text=strings[columns["name"][i]],
+                    id_=node_id,
+                    label=strings[columns["label"][i]],
+                    properties=properties,
+                    embedding=None,
+                )
+            else:
+                if columns["description"][i]:
+                    properties["entity_description"] = strings[columns["description"][i]]
+                node = EntityNode.model_construct(
+                    name=strings[columns["name"][i]],
+                    label=strings[columns["label"][i]],
+                    properties=properties,
+                    embedding=None,
+                )
+            graph_nodes[node_id] = node
+
+        relations = {}
+        triplets = set()
+        columns = {column: self.edges[column].tolist() for column in EDGE_COLUMNS}
+        for i in range(self.num_edges):
+            properties = json.loads(strings[columns["properties"][i]]) if columns["properties"][i] else {}
+            properties["relationship_description"] = strings[columns["description"][i]]
+            source, label, target = (
+                strings[columns["source"][i]],
+                strings[columns["label"][i]],
+                strings[columns["target"][i]],
+            )
+            relations[f"{source}_{label}_{target}"] = Relation.model_construct(
+                label=label, source_id=source, target_id=target, properties=properties
+            )
+            triplets.add((source, label, target))
+
+        return LabelledPropertyGraph.model_construct(
+            nodes=graph_nodes, relations=relations, triplets=triplets
+        )
+
+    def close(self):
+        # numpy views keep the map alive; drop them before closing it
+        self._offsets = self.kinds = None
+        self.nodes = self.edges = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # still referenced by an outstanding view, released with it
+        self._file.close()
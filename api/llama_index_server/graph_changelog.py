@@ -0,0 +1,57 @@
+import os
+import json
+
+
+class GraphChangeLog:
+    """Append-only log of the nodes and edges each graph version added.
+
+    One JSON line per version, {"version": v, "nodes": [...], "edges": [...]}, in the
+    /graph response shape. The exported graph.json is a snapshot up to some version
+    and the log holds everything after it, so an update only appends its own
+    additions. Compaction folds the log back into a new snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = self._read()
+
+    def _read(self):
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # torn write at the end of the log: that update never finished, and
+                    # appending after the partial line would corrupt the next entry
+                    self._rewrite(entries)
+                    break
+        return entries
+
+    def _rewrite(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def append(self, version: int, nodes, edges):
+        entry = {"version": version, "nodes": nodes, "edges": edges}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.entries.append(entry)
+
+    def since(self, version: int):
+        """Entries for versions after `version`, oldest first."""
+        return [entry for entry in self.entries if entry["version"] > version]
+
+    def size(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def clear(self):
+        """Drop every entry once they are part of a snapshot."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = []
@@ -0,0 +1,152 @@
+from collections import deque
+from typing import Iterable, List, Optional
+
+from llama_index_server.entity_resolution import normalize_entity_name
+
+
+def encode_cursor(offset: int) -> str:
+    return str(offset)
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return offset
+
+
+class GraphIndex:
+    """Adjacency index over the visualization graph (entity nodes and the edges between them).
+
+    Nodes and edges are addressed by position; each node keeps the positions of its
+    incident edges, so neighborhoods, degrees and induced subgraphs are computed
+    without scanning every relation. Built once per graph version from
+    `GraphRAGStore.get_graph_json()`.
+    """
+
+    def __init__(self, graph_json: dict):
+        self.nodes = graph_json["nodes"]
+        self.edges = graph_json["edges"]
+        self.positions = {}
+        self.keys = {}  # normalized name -> position, for case-insensitive lookups
+        for position, node in enumerate(self.nodes):
+            self.positions.setdefault(node["id"], position)
+            self.keys.setdefault(normalize_entity_name(node["id"]), position)
+        self.incident = [[] for _ in self.nodes]  # node position -> incident edge positions
+        self.endpoints = []  # edge position -> (source position, target position)
+        for position, edge in enumerate(self.edges):
+            source = self.positions[edge["source"]]
+            target = self.positions[edge["target"]]
+            self.endpoints.append((source, target))
+            self.incident[source].append(position)
+            if target != source:
+                self.incident[target].append(position)
+
+    def degree(self, position: int) -> int:
+        return len(self.incident[position])
+
+    def find(self, name: str) -> Optional[int]:
+        """Position of an entity by exact or normalized name."""
+        position = self.positions.get(name)
+        if position is None:
+            position = self.keys.get(normalize_entity_name(name))
+        return position
+
+    def neighborhood(self, position: int, hops: int) -> List[int]:
+        """Positions within `hops` edges of a node, in breadth-first order."""
+        seen = {position}
+        order = [position]
+        frontier = deque([(position, 0)])
+        while frontier:
+            current, depth = frontier.popleft()
+            if depth == hops:
+                continue
+            for edge in self.incident[current]:
+                source, target = self.endpoints[edge]
+                neighbor = target if source == current else source
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    order.append(neighbor)
+                    frontier.append((neighbor, depth + 1))
+        return order
+
+    def select(
+        self,
+        entity: Optional[str] = None,
+        hops: int = 1,
+        types: Optional[Iterable[str]] = None,
+        top_n: Optional[int] = None,
+    ) -> List[int]:
+        """Ordered node positions matching the filters.
+
+        `entity` restricts to its `hops` neighborhood (the entity itself is always kept),
+        `types` to entity types (case-insensitive) and `top_n` to the highest degree nodes.
+        Raises KeyError when `entity` is not in the graph.
+        """
+        if entity is not None:
+            center = self.find(entity)
+            if center is None:
+                raise KeyError(entity)
+            selected = self.neighborhood(center, hops)
+        else:
+            center = None
+            selected = list(range(len(self.nodes)))
+        if types:
+            wanted = {t.casefold() for t in types}
+            selected = [
+                p for p in selected
+                if p == center or (self.nodes[p]["type"] or "").casefold() in wanted
+            ]
+        if top_n is not None:
+            selected = sorted(selected, key=lambda p: (-self.degree(p), p))[:top_n]
+        return selected
+
+    def subgraph(self, selected: List[int], cursor: Optional[str] = None, limit: Optional[int] = None):
+        """Page through the subgraph induced by `selected`.
+
+        Returns (nodes, edges, next_cursor). Each edge is returned once, on the page
+        holding the later of its two endpoints, so concatenating pages gives the whole
+        induced subgraph.
+        """
+        offset = decode_cursor(cursor)
+        end = len(selected) if limit is None else min(len(selected), offset + limit)
+        rank = {p: i for i, p in enumerate(selected)}
+        nodes = []
+        edges = []
+        for i in range(offset, end):
+            position = selected[i]
+            nodes.append(self.nodes[position])
+            for edge in self.incident[position]:
+                source, target = self.endpoints[edge]
+                other = target if source == position else source
+                if rank.get(other, end) <= i:
+                    edges.append(self.edges[edge])
+        next_cursor = encode_cursor(end) if end < len(selected) else None
+        return nodes, edges, next_cursor
+
+    def edge_page(self, selected: List[int], cursor: Optional[str] = None, limit: Optional[int] = None):
+        """Page through the edges of the subgraph induced by `selected`.
+
+        Returns (edges, next_cursor) where edges are (edge, source node, target node).
+        """
+        offset = decode_cursor(cursor)
+        if len(selected) == len(self.nodes):
+            positions = range(len(self.edges))  # every node selected, no need to collect
+        else:
+            members = set(selected)
+            positions = sorted({
+                edge for position in selected for edge in self.incident[position]
+                if self.endpoints[edge][0] in members and self.endpoints[edge][1] in members
+            })
+        end = len(positions) if limit is None else min(len(positions), offset + limit)
+        edges = []
+        for i in range(offset, end):
+            source, target = self.endpoints[positions[i]]
+            edges.append((self.edges[positions[i]], self.nodes[source], self.nodes[target]))
+        next_cursor = encode_cursor(end) if end < len(positions) else None
+        return edges, next_cursor
@@ -96,36 +96,202 @@ output:"""
 
 import json
 import re
-from typing import Any
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+KG_TRIPLET_EXTRACT_PACKED_TMPL = KG_TRIPLET_EXTRACT_TMPL.split("3. Output Formatting:")[0].replace(
+    "Given a text document, extract up to {max_knowledge_triplets} knowledge triplets",
+    "You are given several independent text chunks, each wrapped in <chunk id=\"...\"> tags. "
+    "For EACH chunk separately, extract up to {max_knowledge_triplets} knowledge triplets",
+) + """3. Output Formatting:
+- Treat every chunk on its own: only use entities and relationships found in that chunk's text.
+- Return the result in valid JSON format with a single key 'chunks', mapping each chunk id to an object with two keys: 'entities' (list of entity objects) and 'relationships' (list of relationship objects).
+- Include every chunk id, using empty lists when a chunk has no entities or relationships.
+- Exclude any text outside the JSON structure (e.g., no explanations or comments).
+
+--Example Output-
+{
+  "chunks": {
+    "c1": {
+      "entities": [
+        {"entity_name": "Adam", "entity_type": "Person", "entity_description": "Adam is a software engineer who has worked at Microsoft since 2009."},
+        {"entity_name": "Microsoft", "entity_type": "Company", "entity_description": "Microsoft is a technology company."}
+      ],
+      "relationships": [
+        {"source_entity": "Adam", "target_entity": "Microsoft", "relation": "works_for", "relationship_description": "Adam is a software engineer at Microsoft."}
+      ]
+    },
+    "c2": { "entities": [], "relationships": [] }
+  }
+}
+
+
+-Real Data-
+######################
+{chunks}
+######################
+output:"""
+
+
+def format_packed_chunks(chunks: Dict[str, str]) -> str:
+    """Wrap each chunk's text in delimiters carrying its id for a packed extraction prompt."""
+    return "\n".join(
+        f'<chunk id="{chunk_id}">\n{text}\n</chunk>' for chunk_id, text in chunks.items()
+    )
+
+
+# A complete JSON string, or a single structural character
+_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+_decoder = json.JSONDecoder()
+
+
+def _loads_first_object(response_str: str) -> Optional[dict]:
+    """Decode the first JSON object in the response, ignoring text before and after it."""
+    start = response_str.find("{")
+    if start == -1:
+        return None
+    try:
+        data, _ = _decoder.raw_decode(response_str, start)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _try_loads(json_str: str) -> Optional[Any]:
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_json_objects(response_str: str) -> Iterator[Tuple[tuple, str]]:
+    """Yield (keys, json_str) for every complete object in a possibly broken JSON document.
+
+    `keys` holds the key of each enclosing container and of the object itself
+    (None for array items), e.g. (None, "entities", None) for an entity. Inner
+    objects are yielded before the ones containing them, and objects cut off by
+    truncation are never yielded. Code fences and text around the JSON are skipped.
+    """
+    start = response_str.find("{")
+    if start == -1:
+        return
+    stack = []  # (opening char, start offset, key)
+    last_string = None
+    pending_key = None
+    for match in _TOKEN_PATTERN.finditer(response_str, start):
+        token = match.group()
+        if token[0] == '"':
+            last_string = token
+        elif token == ":":
+            pending_key = _try_loads(last_string) if last_string else None
+        elif token == ",":
+            pending_key = last_string = None
+        elif token in "{[":
+            stack.append((token, match.start(), pending_key))
+            pending_key = last_string = None
+        else:
+            opener = "{" if token == "}" else "["
+            if not stack or stack[-1][0] != opener:
+                continue  # stray closing bracket, keep scanning
+            _, begin, key = stack.pop()
+            if token == "}":
+                keys = tuple(frame[2] for frame in stack) + (key,)
+                yield keys, response_str[begin:match.end()]
+
+
+def _text(value) -> str:
+    """A string field of the response: numbers are kept as text, anything else (null,
+    booleans, lists, objects) counts as missing."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return ""
+
+
+def _parse_entity(entity) -> Optional[tuple]:
+    if not isinstance(entity, dict):
+        return None
+    name = _text(entity.get("entity_name"))
+    if not name:
+        return None
+    return (
+        name,
+        _text(entity.get("entity_type")) or "entity",
+        _text(entity.get("entity_description")),
+    )
+
+
+def _parse_relation(relation) -> Optional[tuple]:
+    if not isinstance(relation, dict):
+        return None
+    source = _text(relation.get("source_entity"))
+    target = _text(relation.get("target_entity"))
+    label = _text(relation.get("relation"))
+    if not (source and target and label):
+        return None
+    return (source, target, label, _text(relation.get("relationship_description")))
+
+
+def _parse_extraction(data: dict):
+    """Entities and relationships from a decoded response, skipping malformed items."""
+    entities = [
+        entity for entity in map(_parse_entity, data.get("entities") or []) if entity
+    ]
+    relationships = [
+        relation for relation in map(_parse_relation, data.get("relationships") or []) if relation
+    ]
+    return entities, relationships
+
 
 def parse_fn(response_str: str) -> Any:
-    json_pattern = r"\{.*\}"
-    match = re.search(json_pattern, response_str, re.DOTALL)
+    """Parse an extraction response into (entities, relationships).
+
+    Well-formed JSON is decoded directly. Truncated or malformed responses fall
+    back to salvaging every complete entity and relationship object in them.
+    """
+    data = _loads_first_object(response_str)
+    if data is not None:
+        return _parse_extraction(data)
+
     entities = []
     relationships = []
-    if not match:
-        return entities, relationships
-    json_str = match.group(0)
-    try:
-        data = json.loads(json_str)
-        entities = [
-            (
-                entity["entity_name"],
-                entity["entity_type"],
-                entity["entity_description"],
-            )
-            for entity in data.get("entities", [])
-        ]
-        relationships = [
-            (
-                relation["source_entity"],
-                relation["target_entity"],
-                relation["relation"],
-                relation["relationship_description"],
-            )
-            for relation in data.get("relationships", [])
-        ]
-        return entities, relationships
-    except json.JSONDecodeError as e:
-        print("Error parsing JSON:", e)
-        return entities, relationships
\ No newline at end of file
+    for keys, json_str in iter_json_objects(response_str):
+        if len(keys) < 2 or keys[-1] is not None:
+            continue
+        if keys[-2] == "entities":
+            entity = _parse_entity(_try_loads(json_str))
+            if entity:
+                entities.append(entity)
+        elif keys[-2] == "relationships":
+            relation = _parse_relation(_try_loads(json_str))
+            if relation:
+                relationships.append(relation)
+    if not entities and not relationships:
+        print("Could not parse any entities or relationships from the response.")
+    return entities, relationships
+
+
+def parse_packed_fn(response_str: str) -> Dict[str, Any]:
+    """Parse a packed extraction response into {chunk_id: (entities, relationships)}.
+
+    Only chunks whose object is complete are returned; chunks missing from the
+    response or cut off by truncation are left out so the caller can retry them.
+    """
+    data = _loads_first_object(response_str)
+    if data is not None:
+        chunks = data.get("chunks")
+        if not isinstance(chunks, dict):
+            return {}
+        return {
+            chunk_id: _parse_extraction(chunk_data)
+            for chunk_id, chunk_data in chunks.items()
+            if isinstance(chunk_data, dict)
+        }
+
+    results = {}
+    for keys, json_str in iter_json_objects(response_str):
+        if len(keys) >= 2 and keys[-2] == "chunks" and keys[-1] is not None:
+            chunk_data = _try_loads(json_str)
+            if isinstance(chunk_data, dict):
+                results[keys[-1]] = _parse_extraction(chunk_data)
+    return results
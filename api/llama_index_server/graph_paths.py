@@ -0,0 +1,191 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from llama_index.core.utils import get_tokenizer
+
+from llama_index_server.community_ranker import STOPWORDS, tokenize
+from llama_index_server.entity_resolution import normalize_entity_name
+
+
+class PathIndex:
+    """Name index and CSR adjacency over the visualization graph, for path retrieval.
+
+    Entities are addressed by position in `graph_json["nodes"]`. The neighbors of
+    node i are `neighbors[offsets[i]:offsets[i + 1]]`, reached through the edges at
+    the same slice of `edge_ids`; edges are undirected for traversal and keep their
+    direction in the rendered paths. Built once per graph version from
+    `GraphRAGStore.get_graph_json()`.
+    """
+
+    max_name_tokens = 6  # longest entity name (in words) matched in a question
+
+    def __init__(self, graph_json: dict):
+        self.nodes = graph_json["nodes"]
+        self.edges = graph_json["edges"]
+        positions = {}
+        self.names: Dict[str, int] = {}  # normalized name -> position
+        aliases: Dict[str, set] = {}  # last word of a multi-word name -> positions
+        for position, node in enumerate(self.nodes):
+            positions.setdefault(node["id"], position)
+            key = normalize_entity_name(node["id"])
+            if not key or key in STOPWORDS:
+                continue
+            self.names.setdefault(key, position)
+            words = key.split()
+            if len(words) > 1 and words[-1] not in STOPWORDS:
+                aliases.setdefault(words[-1], set()).add(position)
+        # like EntityResolver, a last name only stands for an entity when it is unambiguous
+        self.aliases = {
+            word: next(iter(found)) for word, found in aliases.items()
+            if len(found) == 1 and word not in self.names
+        }
+
+        num_nodes = len(self.nodes)
+        num_edges = len(self.edges)
+        sources = np.fromiter((positions[e["source"]] for e in self.edges), dtype=np.int64, count=num_edges)
+        targets = np.fromiter((positions[e["target"]] for e in self.edges), dtype=np.int64, count=num_edges)
+        self.sources = sources
+        keep = sources != targets  # self loops are listed once
+        heads = np.concatenate([sources, targets[keep]])
+        tails = np.concatenate([targets, sources[keep]])
+        edge_ids = np.concatenate([np.arange(num_edges), np.flatnonzero(keep)])
+        order = np.argsort(heads, kind="stable")
+        self.neighbors = tails[order].astype(np.int32)
+        self.edge_ids = edge_ids[order].astype(np.int32)
+        self.offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=num_nodes), out=self.offsets[1:])
+
+    def degree(self, position: int) -> int:
+        return int(self.offsets[position + 1] - self.offsets[position])
+
+    def find_seeds(self, question: str) -> List[int]:
+        """Entities named in the question, longest names first, in order of appearance."""
+        words = normalize_entity_name(question).split()
+        seeds = []
+        i = 0
+        while i < len(words):
+            for length in range(min(self.max_name_tokens, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + length])
+                position = self.names.get(phrase)
+                if position is None and length == 1:
+                    position = self.aliases.get(phrase)
+                if position is not None:
+                    if position not in seeds:
+                        seeds.append(position)
+                    i += length
+                    break
+            else:
+                i += 1
+        return seeds
+
+    def expand(self, seed: int, hops: int, max_nodes: int) -> Dict[int, Tuple[int, int]]:
+        """Breadth-first search from `seed`: reached position -> (previous position, edge).
+
+        Stops after `hops` levels or `max_nodes` reached nodes, so the cost of a query
+        stays bounded around hub entities.
+        """
+        parents = {seed: (-1, -1)}
+        frontier = [seed]
+        for _ in range(hops):
+            next_frontier = []
+            for current in frontier:
+                start, end = self.offsets[current], self.offsets[current + 1]
+                for neighbor, edge in zip(self.neighbors[start:end].tolist(), self.edge_ids[start:end].tolist()):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (current, edge)
+                    next_frontier.append(neighbor)
+                    if len(parents) >= max_nodes:
+                        return parents
+            frontier = next_frontier
+        return parents
+
+    @staticmethod
+    def _path_to(parents, target: int) -> List[Tuple[int, int]]:
+        """(position, edge into it) steps from the seed to `target`, seed first."""
+        steps = []
+        while target != -1:
+            previous, edge = parents[target]
+            steps.append((target, edge))
+            target = previous
+        return steps[::-1]
+
+    def rank_paths(self, question: str, seeds: List[int], hops: int = 2, max_nodes: int = 2000):
+        """Shortest paths out of each seed, best first, as (score, [(position, edge), ...]).
+
+        A path scores for ending at another seed (it explains how two asked-about
+        entities are connected) and for question words in its relations, descriptions
+        and end entity; it is divided by its length and penalized for passing through
+        hubs, which connect everything and explain little.
+        """
+        question_terms = set(tokenize(question))
+        seed_set = set(seeds)
+        scored = {}
+        for seed in seeds:
+            parents = self.expand(seed, hops, max_nodes)
+            for target in parents:
+                if target == seed:
+                    continue
+                steps = self._path_to(parents, target)
+                key = frozenset(edge for _, edge in steps[1:])
+                if key in scored:
+                    continue  # same path found from its other end
+                text = [self.nodes[target]["id"], self.nodes[target]["type"] or ""]
+                for _, edge in steps[1:]:
+                    text.append(self.edges[edge]["relationship"] or "")
+                    text.append(self.edges[edge]["description"] or "")
+                overlap = len(question_terms.intersection(tokenize(" ".join(text))))
+                length = len(steps) - 1
+                score = (1 + 3 * (target in seed_set) + overlap) / length
+                score -= 0.05 * sum(math.log1p(self.degree(position)) for position, _ in steps[1:-1])
+                scored[key] = (score, length, target, steps)
+        ranked = sorted(scored.values(), key=lambda item: (-item[0], item[1], item[2]))
+        return [(score, steps) for score, _, _, steps in ranked]
+
+    def _render_path(self, steps) -> str:
+        parts = [self.nodes[steps[0][0]]["id"]]
+        for position, edge in steps[1:]:
+            relationship = self.edges[edge]["relationship"] or "related_to"
+            if self.sources[edge] == position:
+                parts.append(f"<-[{relationship}]-")  # traversed against the edge's direction
+            else:
+                parts.append(f"-[{relationship}]->")
+            parts.append(self.nodes[position]["id"])
+        return " ".join(parts)
+
+    def build_context(self, seeds: List[int], ranked_paths, token_budget: int, max_paths: Optional[int] = None) -> str:
+        """Seed entity descriptions, then the best paths with their relationship descriptions,
+        added whole until `token_budget` tokens or `max_paths` paths."""
+        tokenizer = get_tokenizer()
+        lines = []
+        used = 0
+        for position in seeds:
+            node = self.nodes[position]
+            line = f"Entity: {node['id']} ({node['type']})"
+            if node["description"]:
+                line += f": {node['description']}"
+            cost = len(tokenizer(line))
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+
+        described = set()
+        num_paths = 0
+        for _, steps in ranked_paths:
+            if max_paths is not None and num_paths >= max_paths:
+                break
+            block = ["Path: " + self._render_path(steps)]
+            for _, edge in steps[1:]:
+                if edge in described or not self.edges[edge]["description"]:
+                    continue
+                block.append("  - " + self.edges[edge]["description"])
+            cost = len(tokenizer("\n".join(block)))
+            if used + cost > token_budget:
+                break
+            lines.extend(block)
+            described.update(edge for _, edge in steps[1:])
+            used += cost
+            num_paths += 1
+        return "\n".join(lines)
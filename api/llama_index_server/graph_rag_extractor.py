@@ -19,6 +19,15 @@ from llama_index.core.prompts.default_prompts import (
 from llama_index.core.schema import TransformComponent, BaseNode
 from llama_index.core.bridge.pydantic import BaseModel, Field
 
+from llama_index_server.extraction_cache import ExtractionCache
+from llama_index_server.llm_controller import AdaptiveController
+from llama_index_server.metrics import span
+from llama_index_server.graph_parser import (
+    KG_TRIPLET_EXTRACT_PACKED_TMPL,
+    format_packed_chunks,
+    parse_packed_fn,
+)
+
 
 class GraphRAGExtractor(TransformComponent):
     """Extract triples from a graph.
@@ -36,6 +45,21 @@ class GraphRAGExtractor(TransformComponent):
             The number of workers to use for parallel processing.
         max_paths_per_chunk (int):
             The maximum number of paths to extract per chunk.
+        cache (Optional[ExtractionCache]):
+            On-disk cache of previous extractions, so unchanged chunks skip the LLM.
+        progress_callback (Optional[Callable]):
+            Called as `progress_callback(done, total)` after each chunk is extracted.
+        pack_size (int):
+            Max number of small chunks packed into one extraction request. 1 disables packing.
+        pack_max_chars (int):
+            Chunks up to this many characters are packed; the pack's total text stays under it too.
+        packed_prompt (Union[str, PromptTemplate]):
+            Prompt used for packed requests, with `{chunks}` and `{max_knowledge_triplets}`.
+        parse_packed_fn (callable):
+            Parses a packed response into `{chunk_id: (entities, relationships)}`.
+        controller (Optional[AdaptiveController]):
+            Adapts concurrency and retries LLM calls with backoff. Chunks that still fail
+            are recorded in `failures` so they can be replayed.
     """
 
     llm: LLM
@@ -43,6 +67,14 @@ class GraphRAGExtractor(TransformComponent):
     parse_fn: Callable
     num_workers: int
     max_paths_per_chunk: int
+    cache: Optional[ExtractionCache] = None
+    progress_callback: Optional[Callable] = None
+    pack_size: int = 1
+    pack_max_chars: int = 2000
+    packed_prompt: Optional[PromptTemplate] = None
+    parse_packed_fn: Callable = parse_packed_fn
+    controller: Optional[AdaptiveController] = None
+    failures: List[dict] = Field(default_factory=list)
 
     def __init__(
         self,
@@ -51,12 +83,21 @@ class GraphRAGExtractor(TransformComponent):
         parse_fn: Callable = default_parse_triplets_fn,
         max_paths_per_chunk: int = 10,
         num_workers: int = 4,
+        cache: Optional[ExtractionCache] = None,
+        progress_callback: Optional[Callable] = None,
+        pack_size: int = 1,
+        pack_max_chars: int = 2000,
+        packed_prompt: Optional[Union[str, PromptTemplate]] = None,
+        parse_packed_fn: Callable = parse_packed_fn,
+        controller: Optional[AdaptiveController] = None,
     ) -> None:
         """Init params."""
         from llama_index.core import Settings
 
         if isinstance(extract_prompt, str):
             extract_prompt = PromptTemplate(extract_prompt)
+        if isinstance(packed_prompt, str):
+            packed_prompt = PromptTemplate(packed_prompt)
 
         super().__init__(
             llm=llm or Settings.llm,
@@ -64,6 +105,13 @@ class GraphRAGExtractor(TransformComponent):
             parse_fn=parse_fn,
             num_workers=num_workers,
             max_paths_per_chunk=max_paths_per_chunk,
+            cache=cache,
+            progress_callback=progress_callback,
+            pack_size=pack_size,
+            pack_max_chars=pack_max_chars,
+            packed_prompt=packed_prompt or PromptTemplate(KG_TRIPLET_EXTRACT_PACKED_TMPL),
+            parse_packed_fn=parse_packed_fn,
+            controller=controller,
         )
 
     @classmethod
@@ -77,35 +125,124 @@ class GraphRAGExtractor(TransformComponent):
         return asyncio.run(self.acall(nodes, show_progress=show_progress, **kwargs))
 
 
+    def _cache_key(self, text: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        # Packed and single requests share keys, so a chunk is cached whichever way it was extracted
+        return self.cache.make_key(
+            text,
+            self.extract_prompt.get_template(),
+            self.llm.metadata.model_name,
+            self.max_paths_per_chunk,
+        )
+
+    async def _aget_cached(self, text: str):
+        if self.cache is None:
+            return None
+        cached = await self.cache.aget(self._cache_key(text))
+        if cached is None:
+            return None
+        _, entities, entities_relationship = cached
+        return entities, entities_relationship
+
+    async def _apredict(self, prompt: PromptTemplate, **prompt_args: Any) -> str:
+        if self.controller is None:
+            return await self.llm.apredict(prompt, **prompt_args)
+        return await self.controller.run(lambda: self.llm.apredict(prompt, **prompt_args))
+
+    def _record_failure(self, node: BaseNode, error: Exception):
+        print(f"Extraction failed for chunk {node.node_id}: {error}")
+        self.failures.append({
+            "node_id": node.node_id,
+            "error": f"{type(error).__name__}: {error}",
+        })
+
     async def _aextract(self, node: BaseNode) -> BaseNode:
         """Extract triples from a node."""
         assert hasattr(node, "text")
 
         text = node.get_content(metadata_mode="llm")
+        cached = await self._aget_cached(text)
+        if cached is not None:
+            try:
+                return self._attach_triplets(node, *cached)
+            except Exception as e:
+                print(f"Ignoring unusable cached extraction for chunk {node.node_id}: {e}")
         try:
-            llm_response = await self.llm.apredict(
+            llm_response = await self._apredict(
                 self.extract_prompt,
                 text=text,
                 max_knowledge_triplets=self.max_paths_per_chunk,
             )
             entities, entities_relationship = self.parse_fn(llm_response)
-        except ValueError:
-            entities = []
-            entities_relationship = []
+            # attached before caching, so a parse the graph rejects is neither kept nor fatal
+            node = self._attach_triplets(node, entities, entities_relationship)
+            if self.cache is not None:
+                await self.cache.aput(self._cache_key(text), llm_response, entities, entities_relationship)
+            return node
+        except Exception as e:
+            self._record_failure(node, e)
+            return self._attach_triplets(node, [], [])
+
+    async def _aextract_pack(self, nodes: List[BaseNode]) -> List[BaseNode]:
+        """Extract triples for several small nodes with a single LLM request.
+
+        Chunks are sent with ids and the response is split back per chunk; any chunk
+        missing from the response is retried on its own.
+        """
+        texts = {
+            f"c{i}": node.get_content(metadata_mode="llm")
+            for i, node in enumerate(nodes, start=1)
+        }
+        try:
+            llm_response = await self._apredict(
+                self.packed_prompt,
+                chunks=format_packed_chunks(texts),
+                max_knowledge_triplets=self.max_paths_per_chunk,
+            )
+            results = self.parse_packed_fn(llm_response)
+        except Exception:
+            results = {}
+
+        extracted = []
+        for (chunk_id, text), node in zip(texts.items(), nodes):
+            if chunk_id not in results:
+                extracted.append(await self._aextract(node))
+                continue
+            entities, entities_relationship = results[chunk_id]
+            try:
+                node = self._attach_triplets(node, entities, entities_relationship)
+            except Exception:
+                extracted.append(await self._aextract(node))
+                continue
+            if self.cache is not None:
+                # the packed response covers every chunk, so only this chunk's triplets are kept
+                await self.cache.aput(self._cache_key(text), "", entities, entities_relationship)
+            extracted.append(node)
+        return extracted
 
-        existing_nodes = node.metadata.pop(KG_NODES_KEY, [])
-        existing_relations = node.metadata.pop(KG_RELATIONS_KEY, [])
-        entity_metadata = node.metadata.copy()
+    def _attach_triplets(self, node: BaseNode, entities, entities_relationship) -> BaseNode:
+        """Add the extracted entities and relations to the node's metadata.
+
+        Raises if the graph types reject a value; the node is only changed on success.
+        """
+        metadata = {
+            key: value for key, value in node.metadata.items()
+            if key not in (KG_NODES_KEY, KG_RELATIONS_KEY)
+        }
+        existing_nodes = list(node.metadata.get(KG_NODES_KEY, []))
+        existing_relations = list(node.metadata.get(KG_RELATIONS_KEY, []))
         for entity, entity_type, description in entities:
+            entity_metadata = metadata.copy()
             entity_metadata["entity_description"] = description
             entity_node = EntityNode(
                 name=entity, label=entity_type, properties=entity_metadata
             )
             existing_nodes.append(entity_node)
 
-        relation_metadata = node.metadata.copy()
         for triple in entities_relationship:
             subj, obj, rel, description = triple
+            relation_metadata = metadata.copy()
             relation_metadata["relationship_description"] = description
             rel_node = Relation(
                 label=rel,
@@ -120,17 +257,60 @@ class GraphRAGExtractor(TransformComponent):
         node.metadata[KG_RELATIONS_KEY] = existing_relations
         return node
 
+    async def _amake_packs(self, nodes: List[BaseNode]) -> List[List[BaseNode]]:
+        """Group nodes into extraction requests.
+
+        Cached and large chunks go alone; small uncached chunks are packed up to
+        `pack_size` per request while their combined text fits `pack_max_chars`.
+        """
+        if self.pack_size <= 1:
+            return [[node] for node in nodes]
+        texts = [node.get_content(metadata_mode="llm") for node in nodes]
+        keys = [self._cache_key(text) for text in texts]
+        cached_keys = await self.cache.acached_keys(keys) if self.cache is not None else set()
+        packs = []
+        pack, pack_chars = [], 0
+        for node, text, key in zip(nodes, texts, keys):
+            cached = key in cached_keys
+            if len(text) > self.pack_max_chars or cached:
+                packs.append([node])
+                continue
+            if pack and (len(pack) >= self.pack_size or pack_chars + len(text) > self.pack_max_chars):
+                packs.append(pack)
+                pack, pack_chars = [], 0
+            pack.append(node)
+            pack_chars += len(text)
+        if pack:
+            packs.append(pack)
+        return packs
+
     async def acall(
         self, nodes: List[BaseNode], show_progress: bool = False, **kwargs: Any
     ) -> List[BaseNode]:
         """Extract triples from nodes async."""
+        total = len(nodes)
+        done = 0
+
+        async def extract(pack):
+            nonlocal done
+            if len(pack) == 1:
+                result = [await self._aextract(pack[0])]
+            else:
+                result = await self._aextract_pack(pack)
+            done += len(pack)
+            if self.progress_callback:
+                self.progress_callback(done, total)
+            return result
+
         jobs = []
-        for node in nodes:
-            jobs.append(self._aextract(node))
-
-        return await run_jobs(
-            jobs,
-            workers=self.num_workers,
-            show_progress=show_progress,
-            desc="Extracting paths from text",
-        )
\ No newline at end of file
+        for pack in await self._amake_packs(nodes):
+            jobs.append(extract(pack))
+
+        with span("extracting", chunks=total):
+            results = await run_jobs(
+                jobs,
+                workers=self.num_workers,
+                show_progress=show_progress,
+                desc="Extracting paths from text",
+            )
+        return [node for pack in results for node in pack]
@@ -1,55 +1,247 @@
+import asyncio
+
 from llama_index.core.query_engine import CustomQueryEngine
 from llama_index.core.llms import LLM, ChatMessage
+from llama_index.core.async_utils import run_jobs
+from llama_index.core.utils import get_tokenizer
 
 from llama_index_server.graph_rag_store import GraphRAGStore
+from llama_index_server.llm_factory import llm_controller
+from llama_index_server.metrics import span
 
 import re
 
+NO_RELEVANT_ANSWER = "No relevant information found in the graph for this question."
+NO_RELEVANT_MARKER = "NO_RELEVANT_INFORMATION"
+# The marker reply alone, give or take quotes and punctuation; answers that merely
+# mention missing information may still carry a partial answer
+NO_RELEVANT_PATTERN = re.compile(rf"\W*{NO_RELEVANT_MARKER}\W*", re.IGNORECASE)
+
 class GraphRAGQueryEngine(CustomQueryEngine):
     graph_store: GraphRAGStore
     llm: LLM
+    top_k: int = 10  # max communities mapped over per query
+    min_score: float = 0.0  # BM25 score a community must exceed to be considered
+    map_workers: int = 8  # community answers in flight at once
+    reduce_token_budget: int = 3000  # max tokens of intermediate answers per aggregation call
+    mode: str = "local"  # default community level: "global" (coarsest) or "local" (leaves)
 
-    def custom_query(self, query_str: str) -> str:
-        """Process all community summaries to generate answers to a specific query."""
-        community_summaries = self.graph_store.get_community_summaries()
-        community_answers = [
-            self.generate_answer_from_summary(community_summary, query_str)
-            for _, community_summary in community_summaries.items()
+    async def aselect_communities(self, query_str: str, mode: str = None, level: int = None):
+        """Pick the community summaries most relevant to the query from one level of the hierarchy.
+
+        Global questions rarely share keywords with the broad level 0 summaries, so in
+        that partition unmatched communities fill the remaining slots, largest first.
+        In any partition, a query matching no community falls back to the largest ones.
+        """
+        community_summaries = await self.graph_store.aget_community_summaries()
+        mode = mode or self.mode
+        community_ids = self.graph_store.community_ids_at(mode=mode, level=level)
+        ranked = [
+            community_id for community_id, _ in self.graph_store.get_community_ranker(community_ids).rank(
+                query_str, top_k=self.top_k, min_score=self.min_score
+            )
         ]
+        if not ranked or (level is None and mode == "global" and len(ranked) < self.top_k):
+            sizes = self.graph_store.community_sizes
+            rest = sorted(set(community_ids) - set(ranked), key=lambda community_id: (-sizes[community_id], community_id))
+            ranked += rest[: self.top_k - len(ranked)]
+        return [community_summaries[community_id] for community_id in ranked]
 
-        final_answer = self.aggregate_answers(community_answers)
-        return final_answer
+    def custom_query(self, query_str: str) -> str:
+        """Process the relevant community summaries to generate answers to a specific query.
 
-    def generate_answer_from_summary(self, community_summary, query):
-        """Generate an answer from a community summary based on a given query using LLM."""
+        Only for callers without an event loop: the LLM's async client is bound to the
+        loop it was first used on, so servers should await `acustom_query` instead.
+        """
+        return asyncio.run(self.acustom_query(query_str))
+
+    def answer(self, query_str: str, mode: str = None, level: int = None) -> str:
+        """Answer from the communities of `mode` ("global"/"local") or hierarchy `level`."""
+        return asyncio.run(self.acustom_query(query_str, mode=mode, level=level))
+
+    async def acustom_query(self, query_str: str, mode: str = None, level: int = None) -> str:
+        """Map the query over relevant communities concurrently, then reduce the answers."""
+        relevant_summaries = await self.aselect_communities(query_str, mode=mode, level=level)
+        if not relevant_summaries:
+            return NO_RELEVANT_ANSWER
+        jobs = [
+            self._atry_answer_from_summary(community_summary, query_str)
+            for community_summary in relevant_summaries
+        ]
+        with span("query_map", communities=len(jobs)):
+            community_answers = self._drop_failed_answers(await run_jobs(
+                jobs, workers=self.map_workers, desc="Answering from communities"
+            ))
+        with span("query_reduce"):
+            return await self.areduce_answers(community_answers, query_str)
+
+    def _answer_messages(self, community_summary, query):
         prompt = (
             f"Given the community summary: {community_summary}, "
-            f"how would you answer the following query? Query: {query}"
+            f"how would you answer the following query? Query: {query}\n"
+            f"If the summary has nothing relevant to the query, reply only with {NO_RELEVANT_MARKER}."
         )
-        messages = [
+        return [
             ChatMessage(role="system", content=prompt),
             ChatMessage(
                 role="user",
                 content="I need an answer based on the above information.",
             ),
         ]
-        response = self.llm.chat(messages)
+
+    def generate_answer_from_summary(self, community_summary, query):
+        """Generate an answer from a community summary based on a given query using LLM."""
+        response = self.llm.chat(self._answer_messages(community_summary, query))
         cleaned_response = re.sub(r"^assistant:\s*", "", str(response)).strip()
         return cleaned_response
 
-    def aggregate_answers(self, community_answers):
-        """Aggregate individual community answers into a final, coherent response."""
-        # intermediate_text = " ".join(community_answers)
-        prompt = "Combine the following intermediate answers into a final, concise response."
-        messages = [
+    async def agenerate_answer_from_summary(self, community_summary, query):
+        """Generate an answer from a community summary based on a given query using LLM async."""
+        messages = self._answer_messages(community_summary, query)
+        response = await llm_controller.run(lambda: self.llm.achat(messages))
+        cleaned_response = re.sub(r"^assistant:\s*", "", str(response)).strip()
+        return cleaned_response
+
+    async def _atry_answer_from_summary(self, community_summary, query):
+        """The community's answer, or the error it still failed with after the controller's retries."""
+        try:
+            return await self.agenerate_answer_from_summary(community_summary, query)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _drop_failed_answers(results):
+        """Keep the answers of communities that could be asked; raise only if none could."""
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        if errors:
+            print(f"Answering without {len(errors)} of {len(results)} communities: {errors[0]}")
+        return [result for result in results if not isinstance(result, Exception)]
+
+    @staticmethod
+    def filter_relevant_answers(community_answers):
+        """Drop empty answers and answers saying the community had nothing relevant."""
+        return [
+            answer for answer in community_answers
+            if answer and not NO_RELEVANT_PATTERN.fullmatch(answer)
+        ]
+
+    def _batch_answers(self, community_answers):
+        """Group answers into batches whose token count fits `reduce_token_budget`.
+
+        Every batch holds at least two answers so each reduce level shrinks the list,
+        even if a single answer is over budget.
+        """
+        tokenizer = get_tokenizer()
+        batches = []
+        batch, batch_tokens = [], 0
+        for answer in community_answers:
+            answer_tokens = len(tokenizer(answer))
+            if len(batch) >= 2 and batch_tokens + answer_tokens > self.reduce_token_budget:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(answer)
+            batch_tokens += answer_tokens
+        if len(batch) == 1 and batches:
+            batches[-1].append(batch[0])
+        elif batch:
+            batches.append(batch)
+        return batches
+
+    async def _areduce_to_final_batch(self, answers, query):
+        """Merge answers level by level until they fit in a single aggregation call."""
+        while True:
+            batches = self._batch_answers(answers)
+            if len(batches) == 1:
+                return batches[0]
+            answers = await run_jobs(
+                [self.aaggregate_answers(batch, query) for batch in batches],
+                workers=self.map_workers,
+                desc="Reducing answers",
+            )
+
+    async def areduce_answers(self, community_answers, query):
+        """Tree-reduce community answers in token-bounded batches into one final answer."""
+        answers = self.filter_relevant_answers(community_answers)
+        if not answers:
+            return NO_RELEVANT_ANSWER
+        if len(answers) == 1:
+            return answers[0]
+        final_batch = await self._areduce_to_final_batch(answers, query)
+        return await self.aaggregate_answers(final_batch, query)
+
+    async def astream_query(self, query_str: str, mode: str = None, level: int = None):
+        """Stream a query as ("partial", answer) events for each community answer as it
+        completes, then ("token", delta) events for the final answer."""
+        relevant_summaries = await self.aselect_communities(query_str, mode=mode, level=level)
+        if not relevant_summaries:
+            yield "token", NO_RELEVANT_ANSWER
+            return
+
+        semaphore = asyncio.Semaphore(self.map_workers)
+
+        async def answer(community_summary):
+            async with semaphore:
+                return await self._atry_answer_from_summary(community_summary, query_str)
+
+        results = []
+        answers = []
+        for next_answer in asyncio.as_completed([answer(s) for s in relevant_summaries]):
+            community_answer = await next_answer
+            results.append(community_answer)
+            if not isinstance(community_answer, Exception) and self.filter_relevant_answers([community_answer]):
+                answers.append(community_answer)
+                yield "partial", community_answer
+        self._drop_failed_answers(results)
+
+        if not answers:
+            yield "token", NO_RELEVANT_ANSWER
+            return
+        if len(answers) == 1:
+            yield "token", answers[0]
+            return
+        final_batch = await self._areduce_to_final_batch(answers, query_str)
+        async for delta in self.astream_aggregate_answers(final_batch, query_str):
+            yield "token", delta
+
+    def _aggregate_messages(self, community_answers, query):
+        prompt = (
+            "Combine the following intermediate answers into a final, concise response "
+            f"to the query. Query: {query}"
+        )
+        intermediate_text = "\n\n".join(
+            f"Answer {i}: {answer}" for i, answer in enumerate(community_answers, start=1)
+        )
+        return [
             ChatMessage(role="system", content=prompt),
             ChatMessage(
                 role="user",
-                content=f"Intermediate answers: {community_answers}",
+                content=f"Intermediate answers:\n{intermediate_text}",
             ),
         ]
-        final_response = self.llm.chat(messages)
+
+    def aggregate_answers(self, community_answers, query=""):
+        """Aggregate individual community answers into a final, coherent response."""
+        final_response = self.llm.chat(self._aggregate_messages(community_answers, query))
         cleaned_final_response = re.sub(
             r"^assistant:\s*", "", str(final_response)
         ).strip()
-        return cleaned_final_response
\ No newline at end of file
+        return cleaned_final_response
+
+    async def aaggregate_answers(self, community_answers, query=""):
+        """Aggregate individual community answers into a final, coherent response async."""
+        messages = self._aggregate_messages(community_answers, query)
+        final_response = await llm_controller.run(lambda: self.llm.achat(messages))
+        cleaned_final_response = re.sub(
+            r"^assistant:\s*", "", str(final_response)
+        ).strip()
+        return cleaned_final_response
+
+    async def astream_aggregate_answers(self, community_answers, query=""):
+        """Aggregate individual community answers, yielding the final response as it is generated."""
+        messages = self._aggregate_messages(community_answers, query)
+        stream = await llm_controller.run(lambda: self.llm.astream_chat(messages))
+        async for chunk in stream:
+            if chunk.delta:
+                yield chunk.delta
@@ -1,17 +1,250 @@
 import re
+import os
+import asyncio
+import json
+import hashlib
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+import numpy as np
 from llama_index.core.graph_stores import SimplePropertyGraphStore
-import networkx as nx
-from graspologic.partition import hierarchical_leiden
 from llama_index.core.llms import ChatMessage
-from llama_index_server.llm_factory import Gemini
+from llama_index.core.async_utils import run_jobs
+from llama_index_server.llm_factory import Gemini, llm_controller
+from llama_index_server.community_ranker import CommunityRanker
+from llama_index_server.community_graph import CommunityGraph
+from llama_index_server.graph_binary import GRAPH_BINARY_FNAME, BinaryGraph, write_graph_binary
+from llama_index_server.metrics import span
+from llama_index.core.graph_stores.types import EntityNode
 
 class GraphRAGStore(SimplePropertyGraphStore):
-    community_summary = {}
     max_cluster_size = 5
+    random_seed = 42
+    summary_workers = 8  # community summaries in flight at once
+    max_summary_edges = 100  # larger communities are summarized from their sub-communities' summaries
 
-    def generate_community_summary(self, text):
-        """Generate summary for a given text using an LLM."""
-        messages = [
+    def __init__(self, graph=None, summary_path: str = None):
+        self._binary = None  # memory-mapped graph file, until the graph is materialized
+        self._binary_lock = threading.Lock()
+        self._binary_readers = 0  # exports reading the file; it is closed once the last one ends
+        self._community_graph = None  # edge list for clustering, built on first use and kept current
+        super().__init__(graph)
+        self.summary_llm = None
+        self.community_summary = {}
+        self.community_hashes = {}  # community_id -> hash of its member edges
+        self.community_levels = {}  # community_id -> level in the hierarchy, 0 is the coarsest
+        self.community_parents = {}  # community_id -> parent community_id (None at level 0)
+        self.community_sizes = {}  # community_id -> edges inside it, including its sub-communities'
+        self.summary_cache = {}  # edge hash -> summary
+        self.community_rankers = {}  # community ids -> keyword index over their summaries
+        self.community_generation = 0  # bumped by invalidate_communities
+        self._community_lock = threading.Lock()  # invalidation vs committing a finished build
+        self._community_build = None  # Future of the build in flight, awaited by concurrent callers
+        self._community_build_lock = threading.Lock()
+        self.summary_path = None
+        if summary_path:
+            self.load_community_summaries(summary_path)
+
+    @property
+    def graph(self):
+        """The llama_index graph, materialized from the binary file on first access."""
+        if self._graph is None and self._binary is not None:
+            with self._binary_lock:
+                if self._graph is None and self._binary is not None:
+                    binary = self._binary
+                    self._graph = binary.to_labelled_graph()
+                    self._binary = None
+                    if not self._binary_readers:
+                        binary.close()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._community_graph = None
+
+    def upsert_relations(self, relations):
+        """Add relations, keeping the clustering edge list current."""
+        super().upsert_relations(relations)
+        if self._community_graph is not None:
+            for relation in relations:
+                self._community_graph.add(self.graph._get_relation_key(relation=relation), relation)
+
+    def delete(self, entity_names=None, relation_names=None, properties=None, ids=None):
+        """Delete matching data; the clustering edge list is rebuilt on next use."""
+        super().delete(entity_names=entity_names, relation_names=relation_names, properties=properties, ids=ids)
+        self._community_graph = None
+
+    @contextmanager
+    def _reading_binary(self):
+        """The binary file while the graph isn't materialized (else None), kept open for the block.
+
+        Materializing the graph from another thread meanwhile leaves the file open
+        until the last reader is done.
+        """
+        with self._binary_lock:
+            binary = self._binary if self._graph is None else None
+            if binary is not None:
+                self._binary_readers += 1
+        try:
+            yield binary
+        finally:
+            if binary is not None:
+                with self._binary_lock:
+                    self._binary_readers -= 1
+                    if not self._binary_readers and binary is not self._binary:
+                        binary.close()
+
+    def get_community_graph(self):
+        """Integer-indexed edge list of the graph, with the last partition cached on it."""
+        if self._community_graph is None:
+            self._community_graph = CommunityGraph.from_relations(self.graph.relations)
+        return self._community_graph
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, fs=None):
+        """Load from the binary graph file, falling back to the JSON one of older caches."""
+        binary_path = os.path.join(persist_dir, GRAPH_BINARY_FNAME)
+        if fs is None and os.path.exists(binary_path):
+            return cls.from_binary(binary_path)
+        return super().from_persist_dir(persist_dir, fs=fs)
+
+    @classmethod
+    def from_binary(cls, binary_path: str):
+        store = cls()
+        store._graph = None
+        store._binary = BinaryGraph(binary_path)
+        return store
+
+    def persist(self, persist_path: str, fs=None):
+        """Persist the graph in the binary format, next to where the JSON file would go."""
+        if fs is not None:
+            return super().persist(persist_path, fs=fs)
+        binary_path = os.path.join(os.path.dirname(persist_path), GRAPH_BINARY_FNAME)
+        with self._reading_binary() as binary:
+            if binary is not None and os.path.abspath(binary.path) == os.path.abspath(binary_path):
+                return  # never materialized, so unchanged since it was loaded
+        write_graph_binary(binary_path, self.graph)
+        if os.path.exists(persist_path):
+            os.remove(persist_path)  # stale JSON from before the binary format
+
+    def get_entities(self):
+        """Entity nodes of the graph, read from the binary file when not yet materialized."""
+        with self._reading_binary() as binary:
+            if binary is not None:
+                return [
+                    EntityNode(
+                        name=binary.string(binary.nodes["name"][i]),
+                        label=binary.string(binary.nodes["label"][i]),
+                    )
+                    for i in binary.entity_indexes()
+                ]
+        return [node for node in self.graph.nodes.values() if isinstance(node, EntityNode)]
+
+    def get_graph_json(self, entity_ids=None, relation_keys=None):
+        """Entity nodes and the edges between them, shaped for visualization.
+
+        With `entity_ids` and `relation_keys`, only those entities and relations are
+        included, e.g. the additions of one update.
+        """
+        if entity_ids is None and relation_keys is None:
+            with self._reading_binary() as binary:
+                if binary is not None:
+                    return binary.to_graph_json()
+        graph = self.graph
+        if entity_ids is None:
+            entity_ids = graph.nodes.keys()
+        if relation_keys is None:
+            relation_keys = graph.relations.keys()
+        nodes = []
+        edges = []
+        for node_id in entity_ids:
+            node = graph.nodes.get(node_id)
+            if not isinstance(node, EntityNode):
+                continue
+            nodes.append({
+                "id": node.name,
+                "type": node.label,
+                "description": node.properties.get("entity_description", "")
+            })
+        for key in relation_keys:
+            edge = graph.relations.get(key)
+            if edge is None:
+                continue
+            if not isinstance(graph.nodes.get(edge.source_id), EntityNode) or not isinstance(graph.nodes.get(edge.target_id), EntityNode):
+                continue
+            edges.append({
+                "source": edge.source_id,
+                "target": edge.target_id,
+                "relationship": edge.label or "related_to",
+                "description": edge.properties.get("relationship_description", "")
+            })
+        return {"nodes": nodes, "edges": edges}
+
+    def load_community_summaries(self, summary_path: str):
+        """Attach the per-graph summary file and load any summaries persisted in it."""
+        self.summary_path = summary_path
+        if not os.path.exists(summary_path):
+            return
+        with open(summary_path, "r") as f:
+            data = json.load(f)
+        self.summary_cache = data.get("summaries", {})
+        self.community_hashes = {
+            int(community_id): edge_hash
+            for community_id, edge_hash in data.get("communities", {}).items()
+        }
+        self.community_summary = {
+            community_id: self.summary_cache[edge_hash]
+            for community_id, edge_hash in self.community_hashes.items()
+            if edge_hash in self.summary_cache
+        }
+        # files from before the hierarchy was kept hold flat communities, read them as leaves
+        hierarchy = data.get("hierarchy", {})
+        self.community_levels = {}
+        self.community_parents = {}
+        self.community_sizes = {}
+        for community_id in self.community_hashes:
+            level, parent, size = hierarchy.get(str(community_id), (0, None, 0))
+            self.community_levels[community_id] = level
+            self.community_parents[community_id] = parent
+            self.community_sizes[community_id] = size
+        self.community_rankers = {}
+
+    def save_community_summaries(self):
+        """Persist community membership hashes and their summaries next to the index."""
+        if not self.summary_path:
+            return
+        with open(self.summary_path, "w") as f:
+            json.dump(
+                {
+                    "communities": self.community_hashes,
+                    "summaries": self.summary_cache,
+                    "hierarchy": {
+                        community_id: [level, self.community_parents[community_id], self.community_sizes[community_id]]
+                        for community_id, level in self.community_levels.items()
+                    },
+                },
+                f,
+            )
+
+    def invalidate_communities(self):
+        """Mark communities stale after the graph changed.
+
+        Summaries stay cached by edge hash, so only communities whose edges changed
+        are sent back to the LLM on the next build.
+        """
+        with self._community_lock:
+            self.community_generation += 1
+            self.community_summary = {}
+            self.community_hashes = {}
+            self.community_levels = {}
+            self.community_parents = {}
+            self.community_sizes = {}
+            self.community_rankers = {}
+            self.save_community_summaries()
+
+    def _summary_messages(self, text):
+        return [
             ChatMessage(
                 role="system",
                 content=(
@@ -25,65 +258,293 @@ class GraphRAGStore(SimplePropertyGraphStore):
             ),
             ChatMessage(role="user", content=text),
         ]
-        response = Gemini().chat(messages)
+
+    def _get_summary_llm(self):
+        """Create the summarization client once and reuse it for every community."""
+        if self.summary_llm is None:
+            self.summary_llm = Gemini()
+        return self.summary_llm
+
+    def generate_community_summary(self, text):
+        """Generate summary for a given text using an LLM."""
+        response = self._get_summary_llm().chat(self._summary_messages(text))
         clean_response = re.sub(r"^assistant:\s*", "", str(response)).strip()
         return clean_response
 
-    def build_communities(self):
+    async def agenerate_community_summary(self, text):
+        """Generate summary for a given text using an LLM async."""
+        messages = self._summary_messages(text)
+        response = await llm_controller.run(lambda: self._get_summary_llm().achat(messages))
+        clean_response = re.sub(r"^assistant:\s*", "", str(response)).strip()
+        return clean_response
+
+    def build_communities(self, progress_callback=None):
         """Builds communities from the graph and summarizes them."""
-        nx_graph = self._create_nx_graph()
-        community_hierarchical_clusters = hierarchical_leiden(
-            nx_graph, max_cluster_size=self.max_cluster_size
+        return asyncio.run(self.abuild_communities(progress_callback=progress_callback))
+
+    async def abuild_communities(self, progress_callback=None):
+        """Builds communities from the graph and summarizes them async.
+
+        Clustering is CPU bound, so it runs in a thread to keep the event loop free.
+        Returns False if the graph changed meanwhile, in which case the communities
+        are left invalidated and only the new summaries are kept for the next build.
+        """
+        generation = self.community_generation
+        with span("clustering"):
+            communities = await asyncio.to_thread(self._cluster_communities)
+        with span("summarizing", communities=len(communities)):
+            return await self._asummarize_communities(
+                communities, generation, progress_callback=progress_callback
+            )
+
+    def _cluster_communities(self):
+        community_graph = self.get_community_graph()
+        community_hierarchical_clusters = community_graph.cluster(
+            max_cluster_size=self.max_cluster_size, random_seed=self.random_seed
         )
-        community_info = self._collect_community_info(
-            nx_graph, community_hierarchical_clusters
+        return self._collect_community_info(
+            community_graph, community_hierarchical_clusters
         )
-        self._summarize_communities(community_info)
-
-    def _create_nx_graph(self):
-        """Converts internal graph representation to NetworkX graph."""
-        nx_graph = nx.Graph()
-        for node in self.graph.nodes.values():
-            nx_graph.add_node(str(node))
-        for relation in self.graph.relations.values():
-            nx_graph.add_edge(
-                relation.source_id,
-                relation.target_id,
-                relationship=relation.label,
-                description=relation.properties["relationship_description"],
-            )
-        return nx_graph
 
-    def _collect_community_info(self, nx_graph, clusters):
-        """Collect detailed information for each node based on their community."""
-        community_mapping = {item.node: item.cluster for item in clusters}
-        community_info = {}
+    def _collect_community_info(self, community_graph, clusters):
+        """Build the community tree with each community's own edges.
+
+        Returns community_id -> {"level", "parent", "children", "details"}, where
+        details are "source -> target -> relation -> description" lines for the edges
+        whose endpoints share this community but no deeper one; the edges of a
+        community's sub-communities are in their own details.
+        """
+        communities = {}
+        # copies: ingestion may keep adding edges while communities are built
+        sources, targets, num_nodes = community_graph.snapshot()
+        max_level = max((item.level for item in clusters), default=-1)
+        node_cluster = np.full((max_level + 1, num_nodes), -1, dtype=np.int64)
         for item in clusters:
-            cluster_id = item.cluster
-            node = item.node
-            if cluster_id not in community_info:
-                community_info[cluster_id] = []
-
-            for neighbor in nx_graph.neighbors(node):
-                if community_mapping[neighbor] == cluster_id:
-                    edge_data = nx_graph.get_edge_data(node, neighbor)
-                    if edge_data:
-                        detail = f"{node} -> {neighbor} -> {edge_data['relationship']} -> {edge_data['description']}"
-                        community_info[cluster_id].append(detail)
-        return community_info
-
-    def _summarize_communities(self, community_info):
-        """Generate and store summaries for each community."""
-        for community_id, details in community_info.items():
-            details_text = (
-                "\n".join(details) + "."
-            )  # Ensure it ends with a period
-            self.community_summary[
-                community_id
-            ] = self.generate_community_summary(details_text)
+            node_cluster[item.level, int(item.node)] = item.cluster
+            if item.cluster not in communities:
+                communities[item.cluster] = {
+                    "level": item.level, "parent": item.parent_cluster, "children": [], "details": []
+                }
+        for community_id, community in communities.items():
+            if community["parent"] is not None:
+                communities[community["parent"]]["children"].append(community_id)
+
+        # the deepest community holding both endpoints of each edge
+        edge_cluster = np.full(len(sources), -1, dtype=np.int64)
+        for level in range(max_level, -1, -1):
+            source_cluster = node_cluster[level, sources]
+            same = (edge_cluster < 0) & (source_cluster >= 0) & (source_cluster == node_cluster[level, targets])
+            edge_cluster[same] = source_cluster[same]
+
+        relations = self.graph.relations
+        internal = np.flatnonzero(edge_cluster >= 0)
+        for source, target, community_id in zip(
+            sources[internal].tolist(), targets[internal].tolist(), edge_cluster[internal].tolist()
+        ):
+            relation = relations[community_graph.pair_keys[(source, target)]]
+            communities[community_id]["details"].append(
+                f"{relation.source_id} -> {relation.target_id} -> {relation.label} -> "
+                f"{relation.properties['relationship_description']}"
+            )
+        return communities
+
+    @staticmethod
+    def _hash_community(details, child_hashes=()):
+        """Hash a community by its own edges and its sub-communities' hashes, independent of order."""
+        text = "\n".join(sorted(details))
+        if child_hashes:
+            text += "\n--\n" + "\n".join(sorted(child_hashes))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _community_text(self, communities, community_id, sizes, summaries):
+        """What the LLM summarizes for a community: all its edges when there are at most
+        `max_summary_edges`, otherwise its sub-communities' summaries and its own edges."""
+        community = communities[community_id]
+        if sizes[community_id] <= self.max_summary_edges:
+            details = []
+            stack = [community_id]
+            while stack:
+                current = communities[stack.pop()]
+                details.extend(current["details"])
+                stack.extend(current["children"])
+            return "\n".join(details) + "."  # Ensure it ends with a period
+        lines = [
+            f"Sub-community summary: {summaries[child]}"
+            for child in sorted(community["children"]) if child in summaries
+        ]
+        lines.extend(community["details"][: self.max_summary_edges])
+        return "\n".join(lines) + "."
+
+    async def _asummarize_communities(self, communities, generation, progress_callback=None):
+        """Generate and store summaries for each community, reusing cached ones whose edges are unchanged.
+
+        Levels are summarized deepest first, so a community too large to summarize
+        from its edges can be summarized from its sub-communities' summaries. Within a
+        level, missing summaries are generated concurrently, at most `summary_workers`
+        at a time and within the shared controller's adaptive limit, retrying rate
+        limits with backoff. `progress_callback(done, total)` is called as each one completes.
+        """
+        by_level = sorted(communities, key=lambda community_id: -communities[community_id]["level"])
+        community_hashes = {}
+        sizes = {}
+        for community_id in by_level:
+            community = communities[community_id]
+            community_hashes[community_id] = self._hash_community(
+                community["details"], [community_hashes[child] for child in community["children"]]
+            )
+            sizes[community_id] = len(community["details"]) + sum(sizes[child] for child in community["children"])
+        # communities without any edge inside them have nothing to summarize
+        community_hashes = {
+            community_id: edge_hash for community_id, edge_hash in community_hashes.items() if sizes[community_id]
+        }
+
+        total = len({
+            edge_hash for edge_hash in community_hashes.values() if edge_hash not in self.summary_cache
+        })
+        done = 0
+
+        async def summarize(edge_hash, details_text):
+            nonlocal done
+            summary = await self.agenerate_community_summary(details_text)
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+            return edge_hash, summary
+
+        summaries = {}  # community_id -> summary
+        new_summaries = {}
+        levels = sorted({communities[community_id]["level"] for community_id in community_hashes}, reverse=True)
+        for level in levels:
+            level_ids = [
+                community_id for community_id in by_level
+                if community_id in community_hashes and communities[community_id]["level"] == level
+            ]
+            pending = {}
+            for community_id in level_ids:
+                edge_hash = community_hashes[community_id]
+                if edge_hash not in self.summary_cache and edge_hash not in new_summaries and edge_hash not in pending:
+                    pending[edge_hash] = self._community_text(communities, community_id, sizes, summaries)
+            jobs = [summarize(edge_hash, text) for edge_hash, text in pending.items()]
+            results = await run_jobs(
+                jobs,
+                workers=self.summary_workers,
+                show_progress=True,
+                desc=f"Summarizing level {level} communities",
+            )
+            new_summaries.update(results)
+            for community_id in level_ids:
+                edge_hash = community_hashes[community_id]
+                if edge_hash in self.summary_cache:
+                    summaries[community_id] = self.summary_cache[edge_hash]
+                else:
+                    summaries[community_id] = new_summaries[edge_hash]
+
+        with self._community_lock:
+            if self.community_generation != generation:
+                # clustered before an update: don't commit the old partition over the invalidation
+                self.summary_cache = {**self.summary_cache, **new_summaries}
+                print(f"Graph changed while summarizing; kept {len(new_summaries)} new summaries for the next build.")
+                return False
+            # Only keep summaries of communities that still exist so the file stays bounded
+            self.summary_cache = {
+                edge_hash: summaries[community_id] for community_id, edge_hash in community_hashes.items()
+            }
+            self.community_hashes = community_hashes
+            self.community_summary = summaries
+            self.community_levels = {community_id: communities[community_id]["level"] for community_id in community_hashes}
+            self.community_parents = {community_id: communities[community_id]["parent"] for community_id in community_hashes}
+            self.community_sizes = {community_id: sizes[community_id] for community_id in community_hashes}
+            self.community_rankers = {}
+            self.save_community_summaries()
+        print(
+            f"Summarized {len(community_hashes)} communities over {len(levels)} levels "
+            f"({total} new, {len(community_hashes) - total} reused from cache)."
+        )
+        return True
+
+    def _claim_community_build(self):
+        """(future, owner): the build in flight to wait for, or a new one the caller must run."""
+        with self._community_build_lock:
+            if self._community_build is None:
+                self._community_build = concurrent.futures.Future()
+                return self._community_build, True
+            return self._community_build, False
+
+    def _finish_community_build(self, future, committed=False, error=None):
+        with self._community_build_lock:
+            self._community_build = None
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(committed)
 
     def get_community_summaries(self):
-        """Returns the community summaries, building them if not already done."""
-        if not self.community_summary:
-            self.build_communities()
-        return self.community_summary
\ No newline at end of file
+        """Returns the community summaries, building them if not already done.
+
+        Concurrent callers, sync or async, share one build. A build that ran into a
+        graph update is redone from the changed graph, reusing the summaries it made.
+        """
+        while not self.community_summary:
+            future, owner = self._claim_community_build()
+            if owner:
+                try:
+                    committed = self.build_communities()
+                except BaseException as e:
+                    self._finish_community_build(future, error=e if isinstance(e, Exception) else None)
+                    raise
+                self._finish_community_build(future, committed)
+            else:
+                committed = future.result()
+            if committed:
+                break
+        return self.community_summary
+
+    async def aget_community_summaries(self):
+        """Returns the community summaries, building them async if not already done; see
+        `get_community_summaries`."""
+        while not self.community_summary:
+            future, owner = self._claim_community_build()
+            if owner:
+                try:
+                    committed = await self.abuild_communities()
+                except BaseException as e:
+                    # a cancelled owner leaves waiters to claim the build again
+                    self._finish_community_build(future, error=e if isinstance(e, Exception) else None)
+                    raise
+                self._finish_community_build(future, committed)
+            else:
+                # shielded: a cancelled waiter must not cancel the shared future
+                committed = await asyncio.shield(asyncio.wrap_future(future))
+            if committed:
+                break
+        return self.community_summary
+
+    def community_ids_at(self, mode: str = "local", level: int = None):
+        """Ids of the summarized communities forming one partition of the graph.
+
+        `level` picks that level of the hierarchy, plus communities above it that were
+        small enough not to be split further. Without it, `mode` "global" picks level 0
+        (few, broad communities) and "local" the leaves (many, specific ones).
+        """
+        has_children = set(self.community_parents.values())
+        if level is None and mode == "global":
+            level = 0
+        if level is None:
+            return [community_id for community_id in self.community_summary if community_id not in has_children]
+        return [
+            community_id for community_id in self.community_summary
+            if self.community_levels[community_id] == level
+            or (self.community_levels[community_id] < level and community_id not in has_children)
+        ]
+
+    def get_community_ranker(self, community_ids=None):
+        """Returns a keyword index over the summaries of `community_ids` (default: all),
+        built once per set of communities and summaries."""
+        key = tuple(sorted(community_ids)) if community_ids is not None else None
+        ranker = self.community_rankers.get(key)
+        if ranker is None:
+            summaries = self.community_summary
+            if community_ids is not None:
+                summaries = {community_id: summaries[community_id] for community_id in community_ids}
+            ranker = self.community_rankers[key] = CommunityRanker(summaries)
+        return ranker
@@ -0,0 +1,131 @@
+import time
+import random
+import asyncio
+import threading
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+RATE_LIMIT_MARKERS = ("429", "rate limit", "ratelimit", "resource exhausted", "resourceexhausted", "quota")
+TRANSIENT_MARKERS = ("timeout", "timed out", "connection", "unavailable", "internalserver", "overloaded", "502", "503", "504")
+
+
+def is_rate_limit(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying: rate limits, timeouts, connection drops, 5xx and bad model output."""
+    if is_rate_limit(error):
+        return True
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, ValueError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int) and (status_code >= 500 or status_code == 408):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in TRANSIENT_MARKERS)
+
+
+class AdaptiveController:
+    """Adaptive concurrency limit and retry policy shared by LLM calls.
+
+    The limit grows additively while calls finish under `target_latency` seconds,
+    shrinks gently when they get slower and halves on rate limits. Failed calls
+    are retried with jittered exponential backoff.
+
+    State is guarded by a thread lock instead of asyncio primitives, because
+    extraction and summarization run in `asyncio.run` loops on several executor
+    threads that all share one controller.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        target_latency: float = 15.0,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    async def _acquire(self):
+        while True:
+            with self._lock:
+                if self.in_flight < max(self.min_limit, int(self.limit)):
+                    self.in_flight += 1
+                    return
+            await asyncio.sleep(0.05)
+
+    def _release(self, latency: float = None, rate_limited: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif latency is not None:
+                if latency <= self.target_latency:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                else:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Call `fn()` within the concurrency limit, retrying transient errors.
+
+        Raises the last error once retries are exhausted or for non-transient errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            start = time.monotonic()
+            error = latency = None
+            try:
+                result = await fn()
+                latency = time.monotonic() - start
+            except Exception as e:
+                error = e
+            finally:
+                # Also on cancellation (a BaseException), or the slot is lost for the life of the process
+                self._release(latency=latency, rate_limited=error is not None and is_rate_limit(error))
+            if error is None:
+                with self._lock:
+                    self.calls += 1
+                return result
+            if not is_transient(error) or attempt == self.max_retries:
+                with self._lock:
+                    self.failures += 1
+                raise error
+            with self._lock:
+                self.retries += 1
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+            }
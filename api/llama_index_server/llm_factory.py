@@ -13,4 +13,12 @@ llm = Gemini(api_key=GEMINI_API_KEY, model="gemini-1.5-flash")  # or "gemini-pro
 
 # ---- Use OPenai ----
 llm = OpenAI(model="gpt-3.5-turbo")  # You can use  for lower cost
+# Extraction runs in `asyncio.run` loops on ingest threads, while queries use `llm` on the
+# app loop; an async client is bound to the loop it was first used on, so this one opens
+# a client per request instead of sharing one across loops
+extraction_llm = OpenAI(model="gpt-3.5-turbo", reuse_client=False)
 embed_model = OpenAIEmbedding(model="text-embedding-3-small")
+
+# ---- Shared concurrency/retry controller for extraction and summarization calls ----
+from llama_index_server.llm_controller import AdaptiveController
+llm_controller = AdaptiveController(initial_limit=4, max_limit=32)
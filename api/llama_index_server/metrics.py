@@ -0,0 +1,245 @@
+"""Per-stage timings, LLM usage counters and trace spans, rendered in Prometheus text format.
+
+Spans live in a context variable, so they follow asyncio tasks, `asyncio.to_thread`
+and any executor hop that runs the work in a copy of the caller's context (see
+`run_in_thread` in app.py). Every finished span is observed in the
+`stage_seconds{stage=...}` histogram and kept in a bounded buffer of recent spans.
+
+LLM and embedding calls are counted through llama_index's instrumentation
+dispatcher, labelled with the innermost span they ran under.
+"""
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events.embedding import EmbeddingEndEvent, EmbeddingStartEvent
+from llama_index.core.instrumentation.events.llm import LLMChatEndEvent, LLMCompletionEndEvent
+from llama_index.core.utils import get_tokenizer
+
+PREFIX = "n2k_"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_stage() -> str:
+    span = _current_span.get()
+    return span.name if span else "none"
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and duration histograms plus the recent span buffer.
+
+    Gauges that belong to other objects (queue depths, cache counters) are read at
+    scrape time through collectors registered with `register_collector`.
+    """
+
+    def __init__(self, max_spans: int = 2000):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, list]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors = []
+        self.spans = deque(maxlen=max_spans)
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """Register `collector() -> [(name, type, labels, value), ...]`, called on every render."""
+        self._collectors.append(collector)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a stage as a child of the current span (or as a new trace)."""
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                pass  # a streaming generator finalized from another context after its client left
+            self.observe("stage_seconds", span.duration, stage=name)
+            if span.error:
+                self.inc("stage_errors_total", stage=name)
+            self.spans.append(span)
+
+    def trace(self, trace_id: str):
+        return [span.to_dict() for span in list(self.spans) if span.trace_id == trace_id]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(state[0]), state[1], state[2]) for key, state in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        for name, series in sorted(counters.items()):
+            self._header(lines, name, "counter")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value}")
+        for name, series in sorted(histograms.items()):
+            self._header(lines, name, "histogram")
+            for key, (buckets, total, count) in series.items():
+                for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, (('le', str(bound)),))} {bucket_count}")
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {count}")
+
+        collected: Dict[str, list] = {}
+        for collector in self._collectors:
+            for name, kind, labels, value in collector():
+                collected.setdefault((name, kind), []).append((_label_key(labels), value))
+        for (name, kind), samples in sorted(collected.items()):
+            self._header(lines, name, kind)
+            for key, value in samples:
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+
+metrics = Metrics()
+span = metrics.span
+
+metrics.describe("stage_seconds", "Time spent in each pipeline stage.")
+metrics.describe("stage_errors_total", "Stages that ended with an exception.")
+metrics.describe("llm_calls_total", "LLM calls by the stage they ran in.")
+metrics.describe("llm_tokens_total", "LLM tokens by stage and kind (prompt/completion); estimated when the provider reports none.")
+metrics.describe("embedding_calls_total", "Embedding batches by stage.")
+metrics.describe("embedding_texts_total", "Texts embedded by stage.")
+
+
+class UsageEventHandler(BaseEventHandler):
+    """Counts LLM calls, tokens and embeddings from llama_index instrumentation events."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._embedding_starts = {}
+        self._tokenizer = None
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "UsageEventHandler"
+
+    def _count_tokens(self, text: str) -> int:
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer()
+        return len(self._tokenizer(text or ""))
+
+    def _record_llm(self, prompt_text: str, response):
+        stage = current_stage()
+        metrics.inc("llm_calls_total", stage=stage)
+        if response is None:
+            return
+        usage = response.additional_kwargs or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = self._count_tokens(prompt_text)
+        if completion_tokens is None:
+            completion_tokens = self._count_tokens(
+                response.text if hasattr(response, "text") else response.message.content
+            )
+        metrics.inc("llm_tokens_total", prompt_tokens, stage=stage, kind="prompt")
+        metrics.inc("llm_tokens_total", completion_tokens, stage=stage, kind="completion")
+
+    def handle(self, event, **kwargs):
+        if isinstance(event, LLMCompletionEndEvent):
+            self._record_llm(event.prompt, event.response)
+        elif isinstance(event, LLMChatEndEvent):
+            self._record_llm("\n".join(str(m.content or "") for m in event.messages), event.response)
+        elif isinstance(event, EmbeddingStartEvent):
+            self._embedding_starts[event.span_id] = time.perf_counter()
+        elif isinstance(event, EmbeddingEndEvent):
+            stage = current_stage()
+            metrics.inc("embedding_calls_total", stage=stage)
+            metrics.inc("embedding_texts_total", len(event.chunks), stage=stage)
+            started = self._embedding_starts.pop(event.span_id, None)
+            if started is not None:
+                metrics.observe("stage_seconds", time.perf_counter() - started, stage="embedding")
+
+
+get_dispatcher().add_event_handler(UsageEventHandler())
@@ -1,6 +1,24 @@
+import io
+import os
+import queue
+import codecs
+import tarfile
+import zipfile
+import threading
+import contextvars
+
 from llama_index.core import Document
 from llama_index.core.node_parser import SentenceSplitter
 
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".text", ".rst", ".org", ".csv", ".json", ".html", ".htm"}
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+CHUNK_SIZE = 1024
+CHUNK_OVERLAP = 20
+STREAM_READ_SIZE = 1 << 20  # bytes read from a stream at a time
+STREAM_BLOCK_CHARS = 1 << 18  # text handed to the splitter at a time when streaming
+ARCHIVE_MAX_MEMBERS = 10000  # entries an uploaded archive may have, files or not
+ARCHIVE_MAX_BYTES = 512 << 20  # uncompressed text extracted from one archive
+
 
 text= """
 The History and Impact of Quantum Mechanics
@@ -30,15 +48,179 @@ Today, research in quantum mechanics continues to expand, with scientists explor
 """
 
 
+def get_splitter():
+    return SentenceSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+
 def get_nodes(text=text):
     """Convert text to nodes for processing."""
     # Assuming the text is already cleaned and ready for processing
     documents = [Document(text=text)]
 
-    splitter = SentenceSplitter(
-        chunk_size=1024,
-        chunk_overlap=20,
-    )
+    splitter = get_splitter()
     nodes = splitter.get_nodes_from_documents(documents)
 
-    return nodes
\ No newline at end of file
+    return nodes
+
+
+def iter_text_blocks(stream, block_chars=STREAM_BLOCK_CHARS, read_size=STREAM_READ_SIZE):
+    """Decode a binary stream as UTF-8 incrementally, yielding blocks of at most `block_chars`.
+
+    Blocks end at the last paragraph break (else line break) that fits, so the
+    splitter rarely sees a sentence cut in two. At most one block and one read
+    are held in memory at a time.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    while True:
+        data = stream.read(read_size)
+        buffer += decoder.decode(data, final=not data)
+        while len(buffer) >= block_chars:
+            cut = buffer.rfind("\n\n", 0, block_chars)
+            if cut <= 0:
+                cut = buffer.rfind("\n", 0, block_chars)
+            if cut <= 0:
+                cut = block_chars
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if not data:
+            break
+    if buffer.strip():
+        yield buffer
+
+
+def iter_nodes(stream):
+    """Chunk a binary text stream block by block, yielding nodes as they are split.
+
+    Chunks match `get_nodes` except at block boundaries, where there is no overlap.
+    """
+    splitter = get_splitter()
+    for block in iter_text_blocks(stream):
+        yield from splitter.get_nodes_from_documents([Document(text=block)])
+
+
+def prefetch(iterable, depth=2):
+    """Iterate `iterable` in a background thread, staying at most `depth` items ahead.
+
+    The producer runs in a copy of the caller's context (so trace spans nest) and
+    stops once the returned generator is closed; its exceptions are re-raised to
+    the consumer.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException as e:
+            put((end, e))
+
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_note(name: str) -> bool:
+    """Text files worth ingesting; skips hidden files and folders such as .obsidian/ and __MACOSX/."""
+    parts = name.replace("\\", "/").split("/")
+    if any(part.startswith((".", "__")) for part in parts if part not in ("", ".")):
+        return False
+    return os.path.splitext(name)[1].lower() in TEXT_EXTENSIONS
+
+
+def _read_member(stream, name: str, budget: int) -> bytes:
+    """Read an archive member in bounded blocks, raising once it exceeds `budget` bytes.
+
+    Declared sizes can lie, so the limit is enforced on what is actually decompressed.
+    """
+    blocks = []
+    size = 0
+    with stream:
+        while True:
+            block = stream.read(min(STREAM_READ_SIZE, budget - size + 1))
+            if not block:
+                return b"".join(blocks)
+            size += len(block)
+            if size > budget:
+                raise ValueError(f"Archive '{name}' expands to more than {ARCHIVE_MAX_BYTES} bytes.")
+            blocks.append(block)
+
+
+def expand_archive(name: str, data: bytes):
+    """(member name, bytes) of the text files in a zip or tar archive, in archive order.
+
+    Raises ValueError for archives with more than ARCHIVE_MAX_MEMBERS entries or more
+    than ARCHIVE_MAX_BYTES of text, checked before each member is read.
+    """
+    files = []
+    total = 0
+
+    def check(count, size):
+        if count > ARCHIVE_MAX_MEMBERS:
+            raise ValueError(f"Archive '{name}' has more than {ARCHIVE_MAX_MEMBERS} entries.")
+        if total + size > ARCHIVE_MAX_BYTES:
+            raise ValueError(f"Archive '{name}' expands to more than {ARCHIVE_MAX_BYTES} bytes.")
+
+    if name.lower().endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            infos = archive.infolist()
+            check(len(infos), 0)
+            for info in infos:
+                if not info.is_dir() and _is_note(info.filename):
+                    check(0, info.file_size)
+                    content = _read_member(archive.open(info), name, ARCHIVE_MAX_BYTES - total)
+                    total += len(content)
+                    files.append((info.filename, content))
+    else:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+            for count, member in enumerate(archive, start=1):
+                check(count, 0)
+                if member.isfile() and _is_note(member.name):
+                    check(count, member.size)
+                    content = _read_member(archive.extractfile(member), name, ARCHIVE_MAX_BYTES - total)
+                    total += len(content)
+                    files.append((member.name, content))
+    return files
+
+
+def decode_and_chunk(name: str, data: bytes):
+    """Decode one uploaded file and split it into nodes.
+
+    Module level so it can run in a process pool. The file name is kept as
+    metadata for provenance but hidden from the LLM and the embedder, so chunks
+    hit the same extraction cache entries as pasted text.
+    """
+    nodes = get_nodes(text=data.decode("utf-8"))
+    for node in nodes:
+        node.metadata["file_name"] = name
+        node.excluded_llm_metadata_keys.append("file_name")
+        node.excluded_embed_metadata_keys.append("file_name")
+    return nodes
@@ -1,80 +1,477 @@
 import os
 import json
 import datetime
+import hashlib
+import uuid
 import pickle
+import time
+import shutil
+from contextlib import closing, contextmanager
+from itertools import chain, islice
 from llama_index_server.graph_parser import parse_fn, KG_TRIPLET_EXTRACT_TMPL
 from llama_index_server.graph_rag_store import GraphRAGStore
 from llama_index_server.graph_rag_extractor import GraphRAGExtractor
-from llama_index_server.llm_factory import llm, embed_model
+from llama_index_server.llm_factory import llm, extraction_llm, embed_model, llm_controller
 from llama_index.core import PropertyGraphIndex, StorageContext, load_index_from_storage
-from llama_index_server.process_documents import get_nodes
+from llama_index.core.graph_stores.types import EntityNode, KG_NODES_KEY, KG_RELATIONS_KEY
+from llama_index.core.schema import TextNode
+from llama_index_server.process_documents import get_nodes, iter_nodes, prefetch
 from llama_index_server.graph_rag_query_engine import GraphRAGQueryEngine
+from llama_index_server.graph_path_query_engine import GraphPathQueryEngine
+from llama_index_server.extraction_cache import ExtractionCache
+from llama_index_server.entity_resolution import EntityResolver
+from llama_index_server.graph_index import GraphIndex
+from llama_index_server.graph_paths import PathIndex
+from llama_index_server.graph_changelog import GraphChangeLog
+from llama_index_server.metrics import span
+from llama_index_server.config import CHAT_MODE, QUERY_MODE
+
+# Shared by every graph: extractions are content addressed, so identical chunks hit across graphs
+extraction_cache = ExtractionCache(os.path.join("cached_graphs", "extraction_cache.sqlite"))
 
 class RagPipeline:
     """A pipeline for building and querying a knowledge graph using RAG techniques."""
 
-    def __init__(self, graph_id:str, text:str=None, force_rebuild=False):
+    changelog_max_entries = 50  # updates kept in the change log before folding it into graph.json
+    stream_batch_chunks = 64  # chunks extracted per batch when ingesting a stream
+    stream_prefetch_batches = 2  # batches chunked ahead of extraction
+
+    def __init__(self, graph_id:str, text:str=None, force_rebuild=False, progress_callback=None, nodes=None, stream=None):
         self.graph_id = graph_id
         self.text = text
+        self.nodes = nodes  # already chunked input, e.g. from a batch upload, used instead of text
+        self.stream = stream  # binary file read and chunked incrementally, used instead of text
+        self.extracted_before = 0  # chunks extracted by earlier batches of the current ingestion
+        self.progress_callback = progress_callback  # called as (stage, done, total)
         self.base_dir = os.path.join("cached_graphs", self.graph_id)
         self.index_path = os.path.join(self.base_dir, ".index")
         self.graph_path = os.path.join(self.base_dir, "graph.json")
         self.file_log = os.path.join(self.base_dir, "file_log.josn")
+        self.summary_path = os.path.join(self.base_dir, "community_summaries.json")
+        self.fingerprint_path = os.path.join(self.base_dir, "chunk_fingerprints.json")
+        self.failed_chunks_path = os.path.join(self.base_dir, "failed_chunks.json")
+        self.version_path = os.path.join(self.base_dir, "graph_version.json")
+        self.build_id = None  # changes when the graph is rebuilt from scratch
+        self.version = 0  # bumped whenever ingestion changes the graph
+        self._graph_seq = 0  # odd while an update publishes its graph changes, see `read_graph`
+        self.changelog = GraphChangeLog(os.path.join(self.base_dir, "graph_changes.jsonl"))
+        self.snapshot_version = None  # graph version graph.json was written at
         self.force_rebuild = force_rebuild
         self.graph = None
+        self.graph_index = None  # adjacency index over self.graph, built on first subgraph request
+        self.path_engine = None  # path retrieval over self.graph, built on first "paths" chat
 
+        is_new = not os.path.exists(self.index_path)
         os.makedirs(self.base_dir, exist_ok=True)
+        self.chunk_fingerprints = self._load_chunk_fingerprints()
+        self.kg_extractor = self._build_kg_extractor()
+        self.entity_resolver = EntityResolver()
     
-        self.index = self._load_or_build_index()
+        try:
+            self.index = self._load_or_build_index()
+        except Exception:
+            if is_new:
+                # e.g. a stream that fails to decode partway: leave no half-built graph behind
+                shutil.rmtree(self.base_dir, ignore_errors=True)
+            raise
+        self.entity_resolver.add_existing(self._graph_entities())
+        self.progress_callback = None
         self.chat_engine = self.index.as_chat_engine(chat_mode="react", llm=llm)
+        self.query_engine = GraphRAGQueryEngine(
+            graph_store=self.index.property_graph_store, llm=llm, mode=QUERY_MODE
+        )
         
 
     def _load_or_build_index(self):
 
         
         if os.path.exists(self.index_path) and not self.force_rebuild:
-            storage_context = StorageContext.from_defaults(persist_dir=self.index_path) 
-            index = load_index_from_storage(storage_context)
+            with span("loading", graph_id=self.graph_id):
+                graph_store = GraphRAGStore.from_persist_dir(self.index_path)
+                graph_store.load_community_summaries(self.summary_path)
+                storage_context = StorageContext.from_defaults(
+                    persist_dir=self.index_path, property_graph_store=graph_store
+                )
+                index = load_index_from_storage(
+                    storage_context,
+                    kg_extractors=[self.kg_extractor, self.entity_resolver],
+                    embed_model=embed_model,
+                    llm=llm,
+                )
+                self._load_version()
             return index
         
-        if not self.text:
+        if not self.text and not self.nodes and self.stream is None:
             raise ValueError("No text provided to build the knowledge graph index.")
 
         print("Building graph index...")
-        nodes = get_nodes(text=self.text)
-        if not nodes:
-            raise ValueError("No nodes found. Ensure documents are processed correctly.")
-        
-        kg_extractor = GraphRAGExtractor(
-            llm=llm,
+        self._report("chunking")
+        self.extracted_before = 0
+        with closing(self._input_batches()) as batches:
+            # The input isn't needed once it is chunked
+            self.text = self.nodes = self.stream = None
+            nodes = []
+            for batch in batches:
+                nodes = self._filter_new_chunks(batch)
+                if nodes:
+                    break
+            if not nodes:
+                raise ValueError("No nodes found. Ensure documents are processed correctly.")
+
+            with span("indexing", chunks=len(nodes)):
+                index = PropertyGraphIndex(
+                    nodes=nodes,
+                    property_graph_store=GraphRAGStore(summary_path=self.summary_path),
+                    kg_extractors=[self.kg_extractor, self.entity_resolver],
+                    show_progress=True,
+                    embed_model=embed_model,
+                    llm=llm, 
+                )
+            self._commit_chunks(nodes)
+            # A stream's later batches are inserted into the index built from its first
+            for batch in batches:
+                self.extracted_before += len(nodes)
+                nodes = self._filter_new_chunks(batch)
+                if nodes:
+                    with span("indexing", chunks=len(nodes)):
+                        index.insert_nodes(nodes)
+                    self._commit_chunks(nodes)
+
+        # Communities of a previous build are stale; their summaries stay cached by edge hash
+        index.property_graph_store.invalidate_communities()
+        self._report("persisting")
+        with span("persisting"):
+            index.storage_context.persist(persist_dir=self.index_path)
+            self._save_chunk_fingerprints()
+            self._bump_version(new_build=True)
+        # Exports of a previous build are stale
+        self.changelog.clear()
+        if os.path.exists(self.graph_path):
+            os.remove(self.graph_path)
+        print("Graph index cached at:", self.index_path)
+        return index
+
+    @staticmethod
+    def fingerprint_chunk(node):
+        """Content hash of a chunk, used to skip chunks this graph already ingested."""
+        return hashlib.sha256(node.get_content().encode("utf-8")).hexdigest()
+
+    def _load_chunk_fingerprints(self):
+        if self.force_rebuild or not os.path.exists(self.fingerprint_path):
+            return set()
+        with open(self.fingerprint_path, "r") as f:
+            return set(json.load(f))
+
+    def _save_chunk_fingerprints(self):
+        with open(self.fingerprint_path, "w") as f:
+            json.dump(sorted(self.chunk_fingerprints), f)
+
+    def _filter_new_chunks(self, nodes):
+        """Drop chunks already ingested for this graph (or repeated within `nodes`).
+
+        The rest are only recorded as ingested by `_commit_chunks` once they are in
+        the index, so a failed insert doesn't make their text look already ingested.
+        """
+        new_nodes = []
+        seen = set()
+        for node in nodes:
+            fingerprint = self.fingerprint_chunk(node)
+            if fingerprint in self.chunk_fingerprints or fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            new_nodes.append(node)
+        return new_nodes
+
+    def _commit_chunks(self, nodes):
+        """Record inserted chunks as ingested, then move the ones whose extraction failed out again.
+
+        Returns the number of failed chunks.
+        """
+        self.chunk_fingerprints.update(self.fingerprint_chunk(node) for node in nodes)
+        return self._record_failed_chunks(nodes)
+
+    def _load_failed_chunks(self):
+        if not os.path.exists(self.failed_chunks_path):
+            return []
+        with open(self.failed_chunks_path, "r") as f:
+            return json.load(f)
+
+    def _save_failed_chunks(self, failed):
+        with open(self.failed_chunks_path, "w") as f:
+            json.dump(failed, f, indent=2)
+
+    def _record_failed_chunks(self, nodes):
+        """Move chunks whose extraction failed out of the ingested set and into failed_chunks.json.
+
+        They are retried when the same text is uploaded again or by `replay_failed_chunks`
+        (queued by POST /graphs/{graph_id}/replay).
+        Returns the number of failed chunks.
+        """
+        failures = self.kg_extractor.failures
+        self.kg_extractor.failures = []
+        if not failures:
+            return 0
+        nodes_by_id = {node.node_id: node for node in nodes}
+        failed = {entry["fingerprint"]: entry for entry in self._load_failed_chunks()}
+        for failure in failures:
+            node = nodes_by_id.get(failure["node_id"])
+            if node is None:
+                continue
+            fingerprint = self.fingerprint_chunk(node)
+            self.chunk_fingerprints.discard(fingerprint)
+            failed[fingerprint] = {
+                "fingerprint": fingerprint,
+                "node_id": node.node_id,
+                "text": node.get_content(),
+                "metadata": {
+                    key: value for key, value in node.metadata.items()
+                    if key not in (KG_NODES_KEY, KG_RELATIONS_KEY)
+                },
+                "excluded_llm_metadata_keys": node.excluded_llm_metadata_keys,
+                "excluded_embed_metadata_keys": node.excluded_embed_metadata_keys,
+                "error": failure["error"],
+                "timestamp": datetime.datetime.utcnow().isoformat(),
+            }
+        self._save_failed_chunks(list(failed.values()))
+        print(f"{len(failures)} chunks failed extraction and were recorded for replay.")
+        return len(failures)
+
+    def _load_version(self):
+        if not os.path.exists(self.version_path):
+            self._bump_version(new_build=True)  # cached before graphs were versioned
+            return
+        with open(self.version_path, "r") as f:
+            data = json.load(f)
+        self.build_id = data["build_id"]
+        self.version = data["version"]
+
+    def _bump_version(self, new_build=False):
+        """Advance the graph version; response caches and ETags key on (build_id, version)."""
+        if new_build:
+            self.build_id = uuid.uuid4().hex[:8]
+            self.version = 0
+        self.version += 1
+        with open(self.version_path, "w") as f:
+            json.dump({"build_id": self.build_id, "version": self.version}, f)
+
+    def _graph_entities(self):
+        return self.index.property_graph_store.get_entities()
+
+    def _graph_snapshot(self):
+        """Ids of the entities and relations currently in the graph store."""
+        graph = self.index.property_graph_store.graph
+        entity_ids = {
+            node_id for node_id, node in graph.nodes.items() if isinstance(node, EntityNode)
+        }
+        return entity_ids, set(graph.relations.keys())
+    
+    def _build_kg_extractor(self):
+        return GraphRAGExtractor(
+            llm=extraction_llm,
             extract_prompt=KG_TRIPLET_EXTRACT_TMPL,
             max_paths_per_chunk=10,
             parse_fn=parse_fn,
-        )
-        index = PropertyGraphIndex(
-            nodes=nodes,
-            property_graph_store=GraphRAGStore(),
-            kg_extractors=[kg_extractor],
-            show_progress=True,
-            embed_model=embed_model,
-            llm=llm, 
+            cache=extraction_cache,
+            pack_size=4,
+            num_workers=llm_controller.max_limit,
+            controller=llm_controller,
+            progress_callback=lambda done, total: self._report(
+                "extracting", self.extracted_before + done, self.extracted_before + total
+            ),
         )
 
-        index.storage_context.persist(persist_dir=self.index_path)
-        print("Graph index cached at:", self.index_path)
-        return index
-    
-    def update_index(self, text: str):
-        """Add new text to the knowledge graph and update the index."""
-        nodes = get_nodes(text=text)
+    def _report(self, stage, done=0, total=0):
+        if self.progress_callback:
+            self.progress_callback(stage, done, total)
+
+    def update_index(self, text: str, progress_callback=None):
+        """Add new text to the knowledge graph and update the index.
+
+        Chunks this graph has already ingested are skipped, so appending to the same
+        notes only pays extraction and embedding for the new text.
+        """
+        self.progress_callback = progress_callback
+        self._report("chunking")
+        with span("chunking"):
+            nodes = get_nodes(text=text)
         if not nodes:
             raise ValueError("No nodes found in the provided text.")
-        self.index.insert_nodes(nodes)
+        self._insert_chunks(nodes)
 
-        print(f"Added {len(nodes)} nodes to the graph index.")
+    def update_index_from_stream(self, stream, progress_callback=None):
+        """Like `update_index`, for a binary text stream such as a spooled upload.
+
+        The stream is read and chunked in a background thread a couple of batches
+        ahead of extraction, so memory stays bounded however large the document is.
+        """
+        self.progress_callback = progress_callback
+        self._report("chunking")
+        with closing(prefetch(self._stream_batches(stream), self.stream_prefetch_batches)) as batches:
+            first = next(batches, None)
+            if first is None:
+                raise ValueError("No nodes found in the provided text.")
+            self._insert_batches(chain([first], batches))
+
+    def _stream_batches(self, stream):
+        nodes = iter_nodes(stream)
+        while True:
+            with span("chunking"):
+                batch = list(islice(nodes, self.stream_batch_chunks))
+            if not batch:
+                return
+            yield batch
+
+    def _input_batches(self):
+        """The pipeline's input as batches of chunks: one batch, or a prefetched stream."""
+        if self.stream is not None:
+            return prefetch(self._stream_batches(self.stream), self.stream_prefetch_batches)
+        with span("chunking"):
+            nodes = self.nodes if self.nodes else get_nodes(text=self.text)
+        return (batch for batch in [nodes])  # closeable, like the stream's
+
+    def insert_nodes(self, nodes, progress_callback=None):
+        """Add already chunked nodes (e.g. the files of a batch upload) in one extraction run."""
+        self.progress_callback = progress_callback
+        if not nodes:
+            raise ValueError("No nodes found in the provided files.")
+        self._insert_chunks(nodes)
+
+    def replay_failed_chunks(self, progress_callback=None):
+        """Re-run extraction for chunks whose LLM calls failed in earlier ingestions.
+
+        Chunks keep their node ids and metadata, so they replace their earlier,
+        triplet-less copies in the index instead of being added next to them.
+        """
+        failed = self._load_failed_chunks()
+        if not failed:
+            return 0
+        self._save_failed_chunks([])
+        self.progress_callback = progress_callback
+        self._insert_chunks([self._failed_chunk_node(entry) for entry in failed])
+        return len(failed)
+
+    @staticmethod
+    def _failed_chunk_node(entry):
+        node = TextNode(
+            text=entry["text"],
+            metadata=entry.get("metadata", {}),
+            excluded_llm_metadata_keys=entry.get("excluded_llm_metadata_keys", []),
+            excluded_embed_metadata_keys=entry.get("excluded_embed_metadata_keys", []),
+        )
+        if entry.get("node_id"):  # missing in entries recorded before ids were kept
+            node.id_ = entry["node_id"]
+        return node
+
+    def _insert_chunks(self, nodes):
+        self._insert_batches([nodes])
+
+    def _insert_batches(self, batches):
+        """Extract and index batches of chunks, then persist and record the update once."""
+        self.extracted_before = 0
+        skipped = failed = 0
+        entities_before = relations_before = None
+        error = None
+        try:
+            for nodes in batches:
+                new_nodes = self._filter_new_chunks(nodes)
+                skipped += len(nodes) - len(new_nodes)
+                if not new_nodes:
+                    continue
+                if entities_before is None:
+                    self.get_graph_json()  # exported view as of before this update, the change log extends it
+                    entities_before, relations_before = self._graph_snapshot()
+                with span("indexing", chunks=len(new_nodes)):
+                    self.index.insert_nodes(new_nodes)
+                failed += self._commit_chunks(new_nodes)
+                self.extracted_before += len(new_nodes)
+        except Exception as e:
+            if not self.extracted_before:
+                raise
+            # e.g. a stream that fails partway: persist and version the batches already
+            # in the index, so memory, disk and caches agree, then fail the ingestion
+            error = e
+        new_chunks = self.extracted_before
+        if not new_chunks:
+            print(f"All {skipped} chunks were already ingested, nothing to update.")
+            self.log_update(filename=self.graph_id, added_nodes=0, added_edges=0, notes=f"Skipped {skipped} already ingested chunks.")
+            return
+
+        entities_after, relations_after = self._graph_snapshot()
+        added_entities = len(entities_after - entities_before)
+        added_relations = len(relations_after - relations_before)
+
+        self._report("persisting")
+        with span("persisting"):
+            self.index.storage_context.persist(persist_dir=self.index_path)
+            self._save_chunk_fingerprints()
+        if added_entities or added_relations:
+            self.index.property_graph_store.invalidate_communities()
+
+        print(f"Added {new_chunks} chunks ({added_entities} entities, {added_relations} relations) to the graph index, skipped {skipped}.")
         # Log the update
-        self.log_update(filename=self.graph_id, added_nodes=len(nodes), added_edges=0, notes="Added new text nodes.")
-        self.export_graph_json()
+        self.log_update(
+            filename=self.graph_id,
+            added_nodes=added_entities,
+            added_edges=added_relations,
+            notes=f"Added {new_chunks} new text chunks, skipped {skipped} already ingested, {failed} failed extraction.",
+        )
+        self._report("exporting")
+        with span("exporting"):
+            self._record_graph_changes(entities_after - entities_before, relations_after - relations_before)
+        if error is not None:
+            raise error
+
+    def _record_graph_changes(self, entity_ids, relation_keys):
+        """Bump the version and append this update's additions to the change log.
+
+        Costs are proportional to the update; graph.json is only rewritten when the
+        log is compacted, from a fresh export of the store rather than the appended lists.
+        """
+        changes = self.index.property_graph_store.get_graph_json(
+            entity_ids=sorted(entity_ids), relation_keys=sorted(relation_keys)
+        )
+        with self._publishing():
+            self.changelog.append(self.version + 1, changes["nodes"], changes["edges"])
+            # New lists rather than extending, so responses being built from the old ones are unaffected
+            self.graph = {
+                "nodes": self.graph["nodes"] + changes["nodes"],
+                "edges": self.graph["edges"] + changes["edges"],
+            }
+            self.graph_index = None
+            self.path_engine = None
+            self._bump_version()  # last, so the new version never labels the old graph
+            if (
+                len(self.changelog.entries) >= self.changelog_max_entries
+                or self.changelog.size() > os.path.getsize(self.graph_path)
+            ):
+                self.graph = self.index.property_graph_store.get_graph_json()
+                self._write_graph_snapshot()
+
+    @contextmanager
+    def _publishing(self):
+        """Mark the exported graph, change log and version as changing (one writer at a time)."""
+        self._graph_seq += 1
+        try:
+            yield
+        finally:
+            self._graph_seq += 1
+
+    def read_graph(self, build):
+        """Run `build()` against a single published graph version.
+
+        Returns ((build_id, version), result). Builds overlapping an update that
+        publishes its changes are retried, so the result matches the version it's
+        returned with.
+        """
+        while True:
+            seq = self._graph_seq
+            if seq % 2:
+                time.sleep(0.01)
+                continue
+            version = (self.build_id, self.version)
+            result = build()
+            if self._graph_seq == seq:
+                return version, result
     
     def build_chat_engine(self):
         """Build the chat engine for the knowledge graph."""
@@ -90,55 +487,78 @@ Always provide short, direct answers. Do not say "Based on the graph" or refer t
         """Build the query engine for the knowledge graph."""
         self.index = self._load_or_build_index()
         self.query_engine = GraphRAGQueryEngine(
-            graph_store=self.index.property_graph_store, llm=llm
+            graph_store=self.index.property_graph_store, llm=llm, mode=QUERY_MODE
         )
         print("Query engine built successfully.")
     
     def export_graph_json(self):
         """Export graph nodes and edges to JSON files for visualization."""
-        graph = self.index.property_graph_store.graph
-        nodes = []
-        edges = []
-        node_ids = set()  # Track unique node IDs to avoid duplicates
-        for node in list(graph.nodes.values()):
-            try:
-                nodes.append({
-                    "id": node.name,
-                    "type": node.label,
-                    "description": node.properties.get("entity_description", "")
-                })
-                node_ids.add(node.name)
-            except Exception as e:
-                continue  # Skip nodes that cause errors
-        for edge in graph.relations.values():
-            if not edge.source_id in node_ids or not edge.target_id in node_ids:
-                continue
-            edges.append({
-                "source": edge.source_id,
-                "target": edge.target_id,
-                "relationship": edge.label or "related_to",
-                "description": edge.properties.get("relationship_description", "")
-            })
-
-        self.graph = {
-            "nodes": nodes,
-            "edges": edges
-        }
-
-        with open(self.graph_path, "w") as f:
-            json.dump(self.graph, f, indent=2)
+        with span("exporting"):
+            graph = self.index.property_graph_store.get_graph_json()
+            with self._publishing():
+                self.graph = graph
+                self.graph_index = None
+                self.path_engine = None
+                self._write_graph_snapshot()
         print(f"Graph exported to '{self.graph_path}")
 
-    def query(self, question: str):
-        """Query the graph using a natural language question."""
-        response =  self.query_engine.query(question)
-        return response.response if response else "No response from chat engine."
+    def _write_graph_snapshot(self):
+        """Write self.graph to graph.json at the current version and empty the change log."""
+        tmp_path = self.graph_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, **self.graph}, f)
+        os.replace(tmp_path, self.graph_path)
+        self.snapshot_version = self.version
+        self.changelog.clear()
+
+    def query(self, question: str, mode: str = None, level: int = None):
+        """Query the graph using a natural language question.
+
+        `mode` "global" answers from the coarsest communities (broad questions, few
+        LLM calls), "local" from the leaf ones; `level` picks a hierarchy level instead.
+        """
+        with span("query", graph_id=self.graph_id, mode=mode or QUERY_MODE, level=level):
+            response = self.query_engine.answer(question, mode=mode, level=level)
+        return response or "No response from chat engine."
+
+    async def aquery(self, question: str, mode: str = None, level: int = None):
+        """Query the graph async, on the caller's event loop; see `query`."""
+        with span("query", graph_id=self.graph_id, mode=mode or QUERY_MODE, level=level):
+            response = await self.query_engine.acustom_query(question, mode=mode, level=level)
+        return response or "No response from chat engine."
     
-    def chat(self, question: str):
-        """Query the graph using a natural language question."""
-        response = self.chat_engine.chat(question)
+    def chat(self, question: str, mode: str = None):
+        """Query the graph using a natural language question.
+
+        `mode` "agent" goes through the ReAct chat engine, "paths" through graph path
+        retrieval with a single LLM call; defaults to CHAT_MODE.
+        """
+        if (mode or CHAT_MODE) == "paths":
+            with span("chat_paths", graph_id=self.graph_id):
+                response = self.get_path_engine().query(question)
+        else:
+            with span("chat", graph_id=self.graph_id):
+                response = self.chat_engine.chat(question)
         return response.response if response else "No response from chat engine."
 
+    async def astream_query(self, question: str, mode: str = None, level: int = None):
+        """Stream community answers and then the final answer tokens for a question."""
+        with span("query_stream", graph_id=self.graph_id, mode=mode or QUERY_MODE, level=level):
+            async for event, data in self.query_engine.astream_query(question, mode=mode, level=level):
+                yield event, data
+
+    async def astream_chat(self, question: str, mode: str = None):
+        """Stream chat answer tokens for a question."""
+        if (mode or CHAT_MODE) == "paths":
+            with span("chat_paths_stream", graph_id=self.graph_id):
+                async for token in self.get_path_engine().astream_answer(question):
+                    yield "token", token
+            return
+        with span("chat_stream", graph_id=self.graph_id):
+            response = await self.chat_engine.astream_chat(question)
+            async for token in response.async_response_gen():
+                yield "token", token
+
     def get_triplets(self):
         """Get all extracted triplets from the knowledge graph."""
         return self.index.property_graph_store.graph.get_triplets()
@@ -148,13 +568,68 @@ Always provide short, direct answers. Do not say "Based on the graph" or refer t
         return self.index.property_graph_store
     
     def get_graph_json(self):
-        """Get the graph in JSON format."""
+        """Get the graph in JSON format: the graph.json snapshot plus the change log after it."""
+        if self.graph is not None:
+            return self.graph
         if not os.path.exists(self.graph_path):
             self.export_graph_json()
-        
+            return self.graph
+
         with open(self.graph_path, "r") as f:
-            return json.load(f)
+            graph = json.load(f)
+        if "version" not in graph:
+            # exported before graphs were versioned, so the change log can't be lined up with it
+            self.export_graph_json()
+            return self.graph
+        self.snapshot_version = graph.pop("version")
+        for entry in self.changelog.since(self.snapshot_version):
+            graph["nodes"].extend(entry["nodes"])
+            graph["edges"].extend(entry["edges"])
+        self.graph = graph
+        return self.graph
+
+    def get_graph_changes(self, since: int, build_id: str = None):
+        """Nodes and edges added after version `since` of build `build_id`.
+
+        Returns None when those versions were already compacted into graph.json or
+        `build_id` isn't the current build, in which case the client refetches the graph.
+        """
+        self.get_graph_json()
+        if build_id is not None and build_id != self.build_id:
+            return None
+        if since > self.version or since < self.snapshot_version:
+            return None
+        nodes = []
+        edges = []
+        for entry in self.changelog.since(since):
+            nodes.extend(entry["nodes"])
+            edges.extend(entry["edges"])
+        return {"nodes": nodes, "edges": edges}
         
+    def get_graph_index(self):
+        """Adjacency index over the exported graph, rebuilt after each update."""
+        if self.graph_index is None:
+            self.graph_index = GraphIndex(self.get_graph_json())
+        return self.graph_index
+
+    def get_path_engine(self):
+        """Path retrieval engine over the exported graph, rebuilt after each update."""
+        if self.path_engine is None:
+            self.path_engine = GraphPathQueryEngine(path_index=PathIndex(self.get_graph_json()), llm=llm)
+        return self.path_engine
+
+    def get_subgraph(self, entity=None, hops=1, types=None, top_n=None, cursor=None, limit=None):
+        """A page of the filtered graph as (nodes, edges, next_cursor)."""
+        graph_index = self.get_graph_index()
+        selected = graph_index.select(entity=entity, hops=hops, types=types, top_n=top_n)
+        return graph_index.subgraph(selected, cursor=cursor, limit=limit)
+
+    def get_triplet_page(self, entity=None, hops=1, types=None, top_n=None, cursor=None, limit=None):
+        """A page of (edge, source node, target node) of the filtered graph, and the next cursor."""
+        graph_index = self.get_graph_index()
+        selected = graph_index.select(entity=entity, hops=hops, types=types, top_n=top_n)
+        return graph_index.edge_page(selected, cursor=cursor, limit=limit)
+
     def get_file_log(self):
         """Get the log of files processed."""
         if not os.path.exists(self.file_log):
@@ -16,6 +16,7 @@ class Triplet(BaseModel):
 
 class TripletResponse(BaseModel):
     triplets: List[Triplet]
+    next_cursor: Optional[str] = None
 
 class Node(BaseModel):
     id: str
@@ -31,7 +32,36 @@ class Edge(BaseModel):
 class GraphResponse(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
+    next_cursor: Optional[str] = None
+
+class Community(BaseModel):
+    id: int
+    level: int  # 0 is the coarsest
+    parent: Optional[int]
+    children: List[int]
+    edges: int  # relations inside it, including its sub-communities'
+    summary: str
+
+class GraphChanges(BaseModel):
+    build_id: str
+    version: int
+    full_refresh: bool  # changes since that version are gone, refetch /graph
+    nodes: List[Node]
+    edges: List[Edge]
 
 class UploadResponse(BaseModel):
-    graph: GraphResponse
-    graph_id: str
\ No newline at end of file
+    graph_id: str
+    job_id: str
+    status: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    graph_id: str
+    status: str
+    stage: str
+    chunks_done: int
+    chunks_total: int
+    error: Optional[str]
+    skipped_files: List[str] = []  # batch upload files that were not valid UTF-8
+    created_at: float
+    updated_at: float
\ No newline at end of file
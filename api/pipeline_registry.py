@@ -0,0 +1,141 @@
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from llama_index_server.rag_pipeline import RagPipeline
+
+
+class PipelineRegistry:
+    """Bounded LRU registry of loaded pipelines with single-flight loading.
+
+    Holds at most `max_entries` pipelines and drops entries idle for longer than
+    `ttl_seconds` (if set). Concurrent requests for a graph that is not loaded yet
+    all await the same load instead of each loading the index.
+
+    Graphs in use by an ingestion job or a load are pinned and never evicted: a
+    second instance loaded from disk meanwhile would miss the job's additions
+    and hand out the same version numbers for a different graph.
+    Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._pipelines: "OrderedDict[str, RagPipeline]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._pins: Dict[str, int] = {}  # graph_id -> holders that must keep it loaded
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, graph_id: str) -> bool:
+        return graph_id in self._pipelines
+
+    def __len__(self) -> int:
+        return len(self._pipelines)
+
+    def get(self, graph_id: str) -> Optional[RagPipeline]:
+        """Return a loaded pipeline and mark it as recently used, or None."""
+        pipeline = self._pipelines.get(graph_id)
+        if pipeline is None:
+            return None
+        if self._expired(graph_id) and graph_id not in self._pins:
+            self._evict(graph_id)
+            return None
+        self._pipelines.move_to_end(graph_id)
+        self._last_used[graph_id] = time.monotonic()
+        return pipeline
+
+    def put(self, graph_id: str, pipeline: RagPipeline):
+        self._pipelines[graph_id] = pipeline
+        self._pipelines.move_to_end(graph_id)
+        self._last_used[graph_id] = time.monotonic()
+        self._evict_expired()
+        self._evict_over_capacity()
+
+    def pin(self, graph_id: str):
+        """Keep graph_id's pipeline (once loaded) from being evicted until `unpin`."""
+        self._pins[graph_id] = self._pins.get(graph_id, 0) + 1
+
+    def unpin(self, graph_id: str):
+        count = self._pins.get(graph_id, 0) - 1
+        if count > 0:
+            self._pins[graph_id] = count
+        else:
+            self._pins.pop(graph_id, None)
+            self._evict_over_capacity()
+
+    @contextmanager
+    def pinned(self, graph_id: str):
+        self.pin(graph_id)
+        try:
+            yield
+        finally:
+            self.unpin(graph_id)
+
+    def pop(self, graph_id: str) -> Optional[RagPipeline]:
+        self._last_used.pop(graph_id, None)
+        return self._pipelines.pop(graph_id, None)
+
+    async def get_or_load(
+        self, graph_id: str, loader: Callable[[], Awaitable[RagPipeline]]
+    ) -> RagPipeline:
+        """Return the pipeline for graph_id, loading it with `loader` at most once at a time."""
+        pipeline = self.get(graph_id)
+        if pipeline is not None:
+            self.hits += 1
+            return pipeline
+        if graph_id in self._loading:
+            self.hits += 1
+            return await asyncio.shield(self._loading[graph_id])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[graph_id] = future
+        self.pin(graph_id)
+        try:
+            pipeline = await loader()
+            self.put(graph_id, pipeline)
+            future.set_result(pipeline)
+            return pipeline
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._loading[graph_id]
+            self.unpin(graph_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._pipelines),
+            "max_entries": self.max_entries,
+            "loading": len(self._loading),
+            "pinned": len(self._pins),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _expired(self, graph_id: str) -> bool:
+        if self.ttl_seconds is None:
+            return False
+        return time.monotonic() - self._last_used[graph_id] > self.ttl_seconds
+
+    def _evict(self, graph_id: str):
+        self.pop(graph_id)
+        self.evictions += 1
+
+    def _evict_expired(self):
+        for graph_id in [g for g in self._pipelines if self._expired(g) and g not in self._pins]:
+            self._evict(graph_id)
+
+    def _evict_over_capacity(self):
+        """Drop least recently used unpinned pipelines while over `max_entries`."""
+        for graph_id in [g for g in self._pipelines if g not in self._pins]:
+            if len(self._pipelines) <= self.max_entries:
+                break
+            self._evict(graph_id)
@@ -0,0 +1,64 @@
+import gzip
+import json
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class CachedResponse:
+    """A serialized JSON body with its ETag and a gzip-compressed copy."""
+
+    def __init__(self, etag: str, payload):
+        self.etag = etag
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=6)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped)
+
+
+class ResponseCache:
+    """LRU cache of serialized responses, bounded by their total size in bytes.
+
+    Keys include the graph version, so entries of older versions are never served
+    again and simply age out. Only touched from the event loop; building a
+    CachedResponse (serialization and compression) happens in a worker thread.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
@@ -0,0 +1,49 @@
+import asyncio
+
+from llama_index_server.llm_controller import AdaptiveController
+
+
+def test_cancelled_call_releases_its_slot():
+    controller = AdaptiveController(initial_limit=1, max_limit=1)
+
+    async def main():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(controller.run(slow))
+        await started.wait()
+        assert controller.in_flight == 1
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert controller.in_flight == 0
+
+        async def quick():
+            return "ok"
+
+        # the only slot is free again
+        assert await asyncio.wait_for(controller.run(quick), timeout=1) == "ok"
+
+    asyncio.run(main())
+
+
+def test_failed_call_releases_its_slot():
+    controller = AdaptiveController(initial_limit=1, max_limit=1, max_retries=0)
+
+    async def failing():
+        raise KeyError("not transient")
+
+    async def main():
+        try:
+            await controller.run(failing)
+        except KeyError:
+            pass
+        assert controller.in_flight == 0
+        assert controller.failures == 1
+
+    asyncio.run(main())
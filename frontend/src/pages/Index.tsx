@@ -23,6 +23,9 @@ interface GraphData {
   }>;
 }
 
+// Only the most connected entities are drawn; the rest stay on the server
+const GRAPH_VIEW_LIMIT = 300;
+
 interface Message {
   id: string;
   text: string;
@@ -136,12 +139,26 @@ const Index = () => {
 
       const data = await uploadResponse.json();
       if (!uploadResponse.ok) throw new Error(data.detail || "Upload failed");
-      //Get graph data and graphId from response
-      const { graph, graph_id } = data;
+      //Upload is processed in the background, poll the job until it finishes
+      const { job_id, graph_id } = data;
       console.log(graph_id);
-      console.log(graph);
       setGraphId(graph_id);
 
+      let job = data;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`http://localhost:8000/jobs/${job_id}`);
+        job = await jobResponse.json();
+        if (!jobResponse.ok) throw new Error(job.detail || "Upload failed");
+      }
+      if (job.status === "failed") throw new Error(job.error || "Upload failed");
+
+      // Step 2: Fetch the updated graph
+      const graphResponse = await fetch(`http://localhost:8000/graph?graph_id=${graph_id}&top_n=${GRAPH_VIEW_LIMIT}`);
+      const graph = await graphResponse.json();
+      if (!graphResponse.ok) throw new Error(graph.detail || "Upload failed");
+      console.log(graph);
+
       const formattedNodes = graph.nodes.map((node: any) => ({
         id: node.id,
         type: node.type,
@@ -219,7 +236,7 @@ const Index = () => {
   };
 
   const handleReloadGraph = async () => {
-      const uploadResponse = await fetch(`http://localhost:8000/graph?graph_id=${graphId}`, {
+      const uploadResponse = await fetch(`http://localhost:8000/graph?graph_id=${graphId}&top_n=${GRAPH_VIEW_LIMIT}`, {
         method: "GET"
       });
 